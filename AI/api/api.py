@@ -1,24 +1,35 @@
-import os, re, string
-from typing import Optional, List, Dict, Any
-import numpy as np
-import pandas as pd
+import hmac, os, time
+from contextlib import asynccontextmanager
+from typing import Optional, List
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field
 
-# NLP / ML
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-from utils.ai_recommender import RecipeRecommender
+# Keep this list light: pandas, scikit-learn and the corpus code load with
+# the first snapshot, not at import (python -m utils.benchmark --import-only)
+from utils.cache import cache_key, make_cache
+from utils.dietary import DIETARY_FILTERS, ALLERGY_FILTERS
+from utils.metrics import (Metrics, TimingMiddleware, collect_stages, profile_call, profile_token,
+                           profiling, record_spans, stage)
+from utils.ranking import top_k
+from utils.scoring_pool import Overloaded, ScoringPool
+from utils.snapshot import NotReady, SnapshotHolder
 
 
 # ---- App setup ----
-app = FastAPI(title="CookMate API")
+@asynccontextmanager
+async def lifespan(app):
+    # Load the corpus once the server is up: /health answers at once, /ready when loaded
+    if not snapshots.ready:
+        snapshots.reload()
+    if WATCH_INTERVAL > 0:
+        snapshots.watch(WATCH_INTERVAL)
+    yield
+    scoring.shutdown()
+
+app = FastAPI(title="CookMate API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -31,308 +42,394 @@ app.add_middleware(
 # ---- Globals ----
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 UTILS_DIR = os.path.join(BASE_DIR, "utils")
-CSV_PATH = os.path.join(UTILS_DIR, "updatedRecipe.csv")
-
-recommender = RecipeRecommender(CSV_PATH)
+# Corpus and prebuilt index locations (benchmarks point these at synthetic data)
+CSV_PATH = os.getenv("COOKMATE_CSV") or os.path.join(UTILS_DIR, "updatedRecipe.csv")
+SEARCH_INDEX_DIR = os.getenv("COOKMATE_INDEX_DIR")  # None: utils/index
+# Recipe ids are int64; anything outside can't name a recipe
+RECIPE_ID_RANGE = range(-2**63, 2**63)
+
+ADMIN_TOKEN = os.getenv("COOKMATE_ADMIN_TOKEN")
+WATCH_INTERVAL = float(os.getenv("COOKMATE_WATCH_INTERVAL") or 0)
+# Approximate recommender search for large corpora, e.g. "ivf:dims=128,probe=16"
+ANN_SPEC = os.getenv("COOKMATE_ANN")
+# Response cache: entries per worker (0 disables), TTL in seconds, optional shared Redis
+CACHE_SIZE = int(os.getenv("COOKMATE_CACHE_SIZE") or 1024)
+CACHE_TTL = float(os.getenv("COOKMATE_CACHE_TTL") or 300)
+CACHE_URL = os.getenv("COOKMATE_CACHE_URL")
+# Scoring runs on a bounded pool ("thread" or "process"); excess load gets a 503
+SCORING_POOL = os.getenv("COOKMATE_SCORING_POOL") or "thread"
+SCORING_WORKERS = int(os.getenv("COOKMATE_SCORING_WORKERS") or min(4, os.cpu_count() or 1))
+SCORING_QUEUE = int(os.getenv("COOKMATE_SCORING_QUEUE") or 64)
+SCORING_TIMEOUT = float(os.getenv("COOKMATE_SCORING_TIMEOUT") or 2.0)
+
+# Load the snapshot at import instead of startup, e.g. for gunicorn --preload
+# so forked workers share it copy-on-write
+PRELOAD = os.getenv("COOKMATE_PRELOAD", "").lower() in ("1", "true", "yes")
+
+# Corpus, recommender and index are loaded once per process (indexes mmapped
+# from prebuilt artifacts) and shared by every route. Reloads build a new
+# snapshot and swap it in atomically.
+snapshots = SnapshotHolder(CSV_PATH, SEARCH_INDEX_DIR, ann=ANN_SPEC, load=PRELOAD)
+response_cache = make_cache(CACHE_SIZE, CACHE_TTL, CACHE_URL)
+scoring = ScoringPool(SCORING_POOL, SCORING_WORKERS, SCORING_QUEUE, SCORING_TIMEOUT)
+
+# Per-route/stage latency histograms (Server-Timing header, /metrics)
+metrics = Metrics()
+app.add_middleware(TimingMiddleware, metrics=metrics)
+
+@metrics.collector
+def service_gauges():
+    status, pool = snapshots.status(), scoring.stats()
+    gauges = [("cookmate_ready", "gauge", "1 once a snapshot is loaded.", int(status["ready"]))]
+    if status["ready"]:
+        gauges += [
+            ("cookmate_recipes", "gauge", "Recipes in the live snapshot.", status["recipes"]),
+            ("cookmate_snapshot_generation", "gauge", "Reloads since start.", status["generation"]),
+            ("cookmate_snapshot_build_seconds", "gauge", "Build time of the live snapshot.", status["buildSeconds"]),
+        ]
+    gauges += [
+        ("cookmate_pool_workers", "gauge", "Scoring pool size.", pool["workers"]),
+        ("cookmate_pool_in_flight", "gauge", "Scoring jobs running.", pool["inFlight"]),
+        ("cookmate_pool_queue_depth", "gauge", "Scoring jobs waiting for a slot.", pool["waiting"]),
+        ("cookmate_pool_completed_total", "counter", "Scoring jobs finished.", pool["completed"]),
+        ("cookmate_pool_rejected_total", "counter", "Requests turned away with a 503.", pool["rejected"]),
+    ]
+    if response_cache:
+        cache = response_cache.stats()
+        gauges += [
+            ("cookmate_cache_entries", "gauge", "Response cache entries in this worker.", cache["entries"]),
+            ("cookmate_cache_hits_total", "counter", "Response cache hits.", cache["hits"]),
+            ("cookmate_cache_misses_total", "counter", "Response cache misses.", cache["misses"]),
+            ("cookmate_cache_evictions_total", "counter", "Entries evicted from the LRU.", cache["evictions"]),
+            ("cookmate_cache_errors_total", "counter", "Cache backend failures.", cache["errors"]),
+        ]
+    return gauges
+
+@app.exception_handler(Overloaded)
+async def overloaded(request, exc):
+    return JSONResponse({"detail": f"Server busy: {exc}"}, status_code=503, headers={"Retry-After": "1"})
+
+@app.exception_handler(NotReady)
+async def not_ready(request, exc):
+    return JSONResponse({"detail": f"Not ready: {exc}"}, status_code=503, headers={"Retry-After": "5"})
+
+def require_admin(token: Optional[str]):
+    # Fail closed: without a configured token the admin routes are disabled
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled; set COOKMATE_ADMIN_TOKEN")
+    if not hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
 
 # ---- Dietary Filtering ----
-DIETARY_FILTERS = {
-    'vegetarian': {
-        'exclude': ['beef', 'chicken', 'pork', 'lamb', 'turkey', 'meat', 'bacon', 'ham', 'sausage'],
-        'include': []
-    },
-    'vegan': {
-        'exclude': ['beef', 'chicken', 'pork', 'lamb', 'turkey', 'meat', 'bacon', 'ham', 'sausage', 
-                   'cheese', 'milk', 'butter', 'cream', 'yogurt', 'egg', 'honey'],
-        'include': []
-    },
-    'gluten-free': {
-        'exclude': ['wheat', 'flour', 'bread', 'pasta', 'noodles', 'barley', 'rye'],
-        'include': []
-    },
-    'dairy-free': {
-        'exclude': ['cheese', 'milk', 'butter', 'cream', 'yogurt'],
-        'include': []
-    },
-    'low-carb': {
-        'exclude': ['rice', 'pasta', 'bread', 'potato', 'noodles'],
-        'include': ['protein', 'vegetables']
-    },
-    'keto': {
-        'exclude': ['rice', 'pasta', 'bread', 'potato', 'sugar', 'fruit'],
-        'include': ['fat', 'protein', 'low carb']
-    },
-    'paleo': {
-        'exclude': ['grain', 'dairy', 'legume', 'processed'],
-        'include': ['meat', 'fish', 'vegetables', 'nuts']
-    }
-}
-
-ALLERGY_FILTERS = {
-    'nuts': ['almond', 'walnut', 'peanut', 'cashew', 'pecan', 'hazelnut'],
-    'shellfish': ['shrimp', 'crab', 'lobster', 'scallop', 'oyster'],
-    'fish': ['salmon', 'tuna', 'cod', 'trout', 'bass'],
-    'eggs': ['egg'],
-    'soy': ['soy', 'tofu', 'tempeh'],
-    'wheat': ['wheat', 'flour', 'bread'],
-    'dairy': ['milk', 'cheese', 'butter', 'cream', 'yogurt']
-}
-
-def apply_dietary_filters(df, dietary_prefs=None, allergies=None):
-    """Apply dietary and allergy filters to recipe dataframe"""
-    if not dietary_prefs and not allergies:
-        return df
-    
-    filtered_df = df.copy()
-    
-    # Apply dietary preferences
-    if dietary_prefs:
-        for pref in dietary_prefs:
-            pref_lower = pref.lower().replace('-', '').replace(' ', '')
-            if pref_lower in DIETARY_FILTERS:
-                filter_config = DIETARY_FILTERS[pref_lower]
-                
-                # Exclude items
-                for exclude_item in filter_config['exclude']:
-                    mask = ~(filtered_df['name'].str.lower().str.contains(exclude_item, na=False) |
-                            filtered_df['ingredients'].str.lower().str.contains(exclude_item, na=False))
-                    filtered_df = filtered_df[mask]
-    
-    # Apply allergy filters
-    if allergies:
-        for allergy in allergies:
-            allergy_lower = allergy.lower()
-            if allergy_lower in ALLERGY_FILTERS:
-                allergens = ALLERGY_FILTERS[allergy_lower]
-                for allergen in allergens:
-                    mask = ~(filtered_df['name'].str.lower().str.contains(allergen, na=False) |
-                            filtered_df['ingredients'].str.lower().str.contains(allergen, na=False))
-                    filtered_df = filtered_df[mask]
-    
-    return filtered_df
-
-# ---- Utils ------
-def clean_json(obj):
-    """Recursively replace NaN/inf with None so JSON is safe."""
-    if isinstance(obj, dict):
-        return {k: clean_json(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [clean_json(v) for v in obj]
-    elif isinstance(obj, float):
-        if np.isnan(obj) or np.isinf(obj):
-            return None
-        return obj
-    return obj
-
-def clean_image(val: str) -> str:
-    """Clean Images field: remove wrappers, split, dedupe, return first valid URL or fallback."""
-    FALLBACK = "https://imgs.search.brave.com/wQGSfW6HB9LQ7WttM6bMy7wbOk7tKuEYEBRcjdNxS8k/rs:fit:860:0:0:0/g:ce/aHR0cHM6Ly91cy4x/MjNyZi5jb20vNDUw/d20vcmVkbGluZXZl/Y3Rvci9yZWRsaW5l/dmVjdG9yMTcwMi9y/ZWRsaW5ldmVjdG9y/MTcwMjA2NDExLzcx/NTEyNjA2LXZlY3Rv/ci1pY29uLW9mLXJv/YXN0ZWQtY2hpY2tl/bi1zZXJ2ZWQtb24t/cGxhdGUtd2l0aC1r/bmlmZS1hbmQtZm9y/ay5qcGc_dmVyPTY"
-
-    if not isinstance(val, str) or not val.strip():
-        return FALLBACK
-
-    val = val.strip().replace("c(", "").replace(")", "").replace('"', "")
-    urls = [u.strip() for u in re.split(r"[,\s]+", val) if u.strip()]
-    seen = set()
-    urls = [u for u in urls if not (u in seen or seen.add(u))]
-    urls = [u.replace("(:max_bytes", "(max_bytes") for u in urls]
-
-    for u in urls:
-        if u.startswith("http"):
-            return u
-    return FALLBACK
-
-def parse_duration(val: str) -> str:
-    """Convert ISO8601 PT1H20M -> '1h 20m'."""
-    if not isinstance(val, str): return "N/A"
-    h, m = 0, 0
-    mobj = re.match(r"PT(?:(\d+)H)?(?:(\d+)M)?", val)
-    if mobj:
-        h = int(mobj.group(1)) if mobj.group(1) else 0
-        m = int(mobj.group(2)) if mobj.group(2) else 0
-    return f"{h}h {m}m" if (h or m) else "N/A"
-
-def clean_ingredients(val: str) -> List[str]:
-    if not isinstance(val, str): return []
-    val = val.replace("c(", "").replace(")", "").replace('"', "")
-    return [x.strip() for x in re.split(r"[;,]", val) if x.strip()]
-
-def clean_instructions(val: str) -> List[str]:
-    if not isinstance(val, str): return []
-    val = val.replace("c(", "").replace(")", "").replace('"', "")
-    steps = [x.strip() for x in re.split(r"\.|\n", val) if x.strip()]
-    return steps
-
-def load_csv() -> pd.DataFrame:
-    if not os.path.exists(CSV_PATH): return pd.DataFrame()
-    csv = pd.read_csv(CSV_PATH, quotechar='"', encoding="utf-8")
-    if "\ufeffRecipeId" in csv.columns:
-        csv = csv.rename(columns={"﻿RecipeId": "RecipeId"})
-    return csv
-
-def clean_image_url(raw_url: str) -> str:
-    if not raw_url:
-        return "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcT27gTKHqKhHk3i-EiarE5Q9IND_awvKaKjxw&s"
-
-    if raw_url.startswith("Error: Message"):
-        return "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcT27gTKHqKhHk3i-EiarE5Q9IND_awvKaKjxw&s"
-
-    url = raw_url.split(",")[0].strip()
-    url = url.removeprefix("c(").removesuffix(")").strip('"').strip()
-    return url
+def apply_dietary_filters(store, dietary_prefs=None, allergies=None):
+    """Row mask of recipes that pass the dietary and allergy filters.
+
+    Uses the per-term bitmaps precomputed with the store, so no text is
+    scanned per request and callers can combine or reuse the mask.
+    """
+    return store.dietary_mask(dietary_prefs, allergies)
+
+# ---- Query correction ----
+def correct_query(snap, text: str):
+    """Fix misspelled query terms before vectorizing; returns (text, corrections)."""
+    if snap.matcher is None:
+        return text, {}
+    return snap.matcher.correct(text, known=snap.known_terms)
+
+# ---- Scoring ----
+def render_json(snap, fn, *args):
+    """Runs on the pool: the JSON body plus the stage spans and seconds it took."""
+    with collect_stages() as timing:
+        result = fn(snap, *args)
+        # Payloads are pre-cleaned and NaN-free, so skip FastAPI's recursive encoder
+        with stage("serialize"):
+            body = JSONResponse(result).body
+    return body, timing.spans, timing.seconds
+
+def profile_json(snap, fn, *args):
+    """render_json under cProfile; returns the profile text and the spans."""
+    (_, spans, _), text = profile_call(render_json, snap, fn, *args)
+    return text, spans
+
+async def score_json(snap, key: Optional[str], fn, *args):
+    """``fn(snap, *args)`` as JSON: from the response cache, else computed on the scoring pool."""
+    if profiling():
+        # Admin asked for ?profile=1: always compute, and return the profile instead
+        require_admin(profile_token())
+        text, spans = await scoring.run(profile_json, snap, fn, *args)
+        record_spans(spans)
+        return PlainTextResponse(text)
+
+    body = None
+    if response_cache and key:
+        with stage("cache"):
+            body = response_cache.get(snap, key)
+    if body is None:
+        started = time.perf_counter()
+        body, spans, seconds = await scoring.run(render_json, snap, fn, *args)
+        record_spans(spans + [("queue", time.perf_counter() - started - seconds)])
+        if response_cache and key:
+            response_cache.set(snap, key, body)
+    return Response(body, media_type="application/json")
 
 # ---- Routes ----
 @app.get("/health")
-def health():
+async def health():
+    """Liveness: the process is up, even while the corpus is still loading."""
     return {"ok": True}
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once a snapshot is loaded, 503 until then."""
+    status = snapshots.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Latency histograms per route and stage, corpus, cache and pool gauges (this worker)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/recipe/{recipe_id}")
-def get_recipe(recipe_id: int):
-    csv = load_csv()
-    if not csv.empty and "RecipeId" in csv.columns:
-        row = csv[csv["RecipeId"] == recipe_id]
-        if not row.empty:
-            r = row.iloc[0]
-            return clean_json({
-                "recipeId": int(r["RecipeId"]),
-                "name": r["Name"],
-                "ingredients": clean_ingredients(str(r.get("RecipeIngredientParts"))),
-                "instructions": clean_instructions(str(r.get("RecipeInstructions") or r.get("Description"))),
-                "cookTime": parse_duration(r.get("TotalTime") or r.get("CookTime")),
-                "calories": r.get("Calories"),
-                "imageUrl": str(r.get("Images")).replace("c(", "").replace(")", "").replace('"', ""),
-                "avgRate": r.get("AggregatedRating"),
-                "fatContent": r.get("FatContent"),
-                "proteinContent": r.get("ProteinContent"),
-                "carbohydrateContent": r.get("CarbohydrateContent"),
-                "fiberContent": r.get("FiberContent"),
-            })
-    raise HTTPException(status_code=404, detail="Recipe not found")
+async def get_recipe(recipe_id: int):
+    detail = snapshots.current.store.detail(recipe_id)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return detail
+
+@app.get("/recipes")
+async def get_recipes(ids: str = Query(..., description="Comma-separated RecipeIds")):
+    """Bulk detail lookup for favorites and menu pages, in the requested order."""
+    try:
+        recipe_ids = [int(x) for x in ids.split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    if len(recipe_ids) > 500:
+        raise HTTPException(status_code=422, detail="At most 500 ids per request")
+    if not all(rid in RECIPE_ID_RANGE for rid in recipe_ids):
+        raise HTTPException(status_code=422, detail="ids must be 64-bit integers")
+
+    store = snapshots.current.store
+    positions = store.positions(recipe_ids)
+    return {
+        "status": "success",
+        "data": [store.detail_record(p) for p in positions if p >= 0],
+        "missing": [rid for rid, p in zip(recipe_ids, positions) if p < 0],
+    }
 
 @app.get("/search")
-def search(
+async def search(
     user_id: int = Query(...),
     ingredients: str = Query(...),
     dietary: Optional[List[str]] = Query(None),
     allergies: Optional[List[str]] = Query(None),
     cuisine: Optional[List[str]] = Query(None),
-    max_calories: Optional[int] = Query(None),
-    max_cook_time: Optional[int] = Query(None)
+    min_calories: Optional[float] = Query(None),
+    max_calories: Optional[float] = Query(None),
+    max_cook_time: Optional[int] = Query(None, description="Minutes (TotalTime, else CookTime)"),
+    min_protein: Optional[float] = Query(None),
+    max_protein: Optional[float] = Query(None),
+    min_carbs: Optional[float] = Query(None),
+    max_carbs: Optional[float] = Query(None),
+    min_fat: Optional[float] = Query(None),
+    max_fat: Optional[float] = Query(None),
+    min_fiber: Optional[float] = Query(None),
+    max_fiber: Optional[float] = Query(None),
+    top_n: int = Query(100, ge=1, le=1000),
+    autocorrect: bool = Query(True)
 ):
-    csv = load_csv()
-    if csv.empty: 
+    snap = snapshots.current
+    if snap.store.empty:
         return {"status": "success", "data": []}
-    
-    df = pd.DataFrame({
-        "id": pd.to_numeric(csv["RecipeId"], errors="coerce"),
-        "name": csv["Name"],
-        "ingredients": csv["RecipeIngredientParts"].astype(str),
-        "instructions": csv["RecipeInstructions"].fillna(csv["Description"]).astype(str),
-        "cookTime": csv["TotalTime"].fillna(csv["CookTime"]),
-        "calories": pd.to_numeric(csv["Calories"], errors="coerce"),
-        "imageUrl": csv["Images"].astype(str),
-        "avgRate": pd.to_numeric(csv["AggregatedRating"], errors="coerce"),
-    }).dropna(subset=["id", "name"])
-
-    # Apply dietary and allergy filters
-    df = apply_dietary_filters(df, dietary, allergies)
-    
-    # Apply calorie filter
-    if max_calories:
-        df = df[df["calories"] <= max_calories]
-    
-    # Apply cuisine filter
-    if cuisine:
-        cuisine_mask = pd.Series([False] * len(df))
-        for c in cuisine:
-            cuisine_mask |= df["name"].str.lower().str.contains(c.lower(), na=False)
-        df = df[cuisine_mask]
-
-    # Text search
-    q = ingredients.lower()
-    tfidf = TfidfVectorizer(stop_words="english")
-    sims = cosine_similarity(
-        tfidf.fit_transform(df["name"] + " " + df["ingredients"]), 
-        tfidf.transform([q])
-    )
-    df["sim"] = sims[:,0]
-    chosen = df.sort_values("sim", ascending=False).head(100)
-
-    return {"status": "success", "data": clean_json([
-        {
-            "recipeId": int(r["id"]),
-            "name": r["name"],
-            "ingredients": clean_ingredients(r["ingredients"]),
-            "instructions": clean_instructions(r["instructions"]),
-            "cookTime": parse_duration(r["cookTime"]),
-            "calories": r["calories"],
-            "imageUrl": clean_image_url(str(r["imageUrl"])),
-            "avgRate": r["avgRate"],
-        } for _, r in chosen.iterrows()
-    ])}
+    ranges = {
+        "calories": (min_calories, max_calories),
+        "cook_time": (None, max_cook_time),
+        "protein": (min_protein, max_protein),
+        "carbs": (min_carbs, max_carbs),
+        "fat": (min_fat, max_fat),
+        "fiber": (min_fiber, max_fiber),
+    }
+    ranges = {name: bound for name, bound in ranges.items() if bound != (None, None)}
+    # The body echoes the corrections made to the query as typed, so key on that text too
+    key = cache_key("search", ingredients, dietary=dietary, allergies=allergies, cuisine=cuisine,
+                    ranges=sorted(ranges.items()) or None, top_n=top_n, autocorrect=autocorrect,
+                    typed=ingredients if autocorrect else None)
+    return await score_json(snap, key, run_search, ingredients, dietary, allergies, cuisine,
+                            ranges, top_n, autocorrect)
+
+def run_search(snap, ingredients, dietary, allergies, cuisine, ranges, top_n, autocorrect):
+    store = snap.store
+
+    with stage("filter"):
+        # Apply dietary and allergy filters
+        mask = apply_dietary_filters(store, dietary, allergies)
+
+        # Calorie, cook-time and nutrition bounds: one pass over precomputed arrays
+        if ranges:
+            store.range_mask(ranges, out=mask)
+
+        # Cuisine filter: ids tagged offline by the corpus build
+        if cuisine:
+            mask &= store.cuisine_mask(cuisine)
+
+    # Text search: score against the whole index, rank only the filtered rows
+    corrections = {}
+    if autocorrect:
+        with stage("correct"):
+            ingredients, corrections = correct_query(snap, ingredients)
+    with stage("score"):
+        sims = snap.search_index.score(ingredients)
+    with stage("rank"):
+        chosen = top_k(sims, top_n, ratings=store.ratings, ids=store.ids, mask=mask)
+    with stage("records"):
+        data = store.search_records(chosen)
+    return {"status": "success", "data": data, "corrections": corrections}
 
 @app.get("/recommend/by_ingredients")
-def recommend_by_ingredients(
+async def recommend_by_ingredients(
     ingredients: str,
     dietary: Optional[List[str]] = Query(None),
-    allergies: Optional[List[str]] = Query(None)
+    allergies: Optional[List[str]] = Query(None),
+    top_n: int = Query(5, ge=1, le=100),
+    autocorrect: bool = Query(True)
 ):
-    # Use existing recommender but apply filters
-    base_recommendations = recommender.recommend_by_ingredients(ingredients)
-    
-    if dietary or allergies:
-        # Apply filters to recommendations
-        csv = load_csv()
-        if not csv.empty:
-            df = pd.DataFrame({
-                "name": csv["Name"],
-                "ingredients": csv["RecipeIngredientParts"].astype(str),
-            })
-            filtered_df = apply_dietary_filters(df, dietary, allergies)
-            
-            # Filter recommendations based on filtered recipes
-            filtered_names = set(filtered_df["name"].tolist())
-            if hasattr(base_recommendations, 'recommendations'):
-                base_recommendations['recommendations'] = [
-                    rec for rec in base_recommendations['recommendations']
-                    if rec.get('name') in filtered_names
-                ]
-    
-    return base_recommendations
+    # Filter before ranking so we still get a full top-n of allowed recipes
+    snap = snapshots.current
+    if snap.recommender is None:
+        return []
+    key = cache_key("by_ingredients", ingredients, dietary=dietary, allergies=allergies,
+                    top_n=top_n, autocorrect=autocorrect)
+    return await score_json(snap, key, run_by_ingredients, ingredients, dietary, allergies, top_n, autocorrect)
+
+def run_by_ingredients(snap, ingredients, dietary, allergies, top_n, autocorrect):
+    if autocorrect:
+        with stage("correct"):
+            ingredients, _ = correct_query(snap, ingredients)
+    with stage("filter"):
+        mask = apply_dietary_filters(snap.store, dietary, allergies) if (dietary or allergies) else None
+    return snap.recommender.recommend_by_ingredients(ingredients, top_n=top_n, mask=mask)
 
 @app.get("/recommend/by_recipe")
-def recommend_by_recipe(
+async def recommend_by_recipe(
     recipe: str,
     dietary: Optional[List[str]] = Query(None),
-    allergies: Optional[List[str]] = Query(None)
+    allergies: Optional[List[str]] = Query(None),
+    top_n: int = Query(5, ge=1, le=100)
+):
+    snap = snapshots.current
+    if snap.recommender is None:
+        return []
+    return await score_json(snap, None, run_by_recipe, recipe, dietary, allergies, top_n)
+
+def run_by_recipe(snap, recipe, dietary, allergies, top_n):
+    with stage("filter"):
+        mask = apply_dietary_filters(snap.store, dietary, allergies) if (dietary or allergies) else None
+    return snap.recommender.recommend_by_recipe(recipe, top_n=top_n, mask=mask)
+
+class BatchQuery(BaseModel):
+    ingredients: Optional[str] = None
+    recipe: Optional[str] = None
+    dietary: Optional[List[str]] = None
+    allergies: Optional[List[str]] = None
+
+class BatchRecommendRequest(BaseModel):
+    queries: List[BatchQuery] = Field(..., max_length=500)
+    top_n: int = Field(5, ge=1, le=100)
+
+@app.post("/recommend/batch")
+async def recommend_batch(body: BatchRecommendRequest):
+    """Recommendations for many ingredient lists and/or recipe titles at once."""
+    if any(bool(q.ingredients) == bool(q.recipe) for q in body.queries):
+        raise HTTPException(status_code=422, detail="Each query needs exactly one of 'ingredients' or 'recipe'")
+    snap = snapshots.current
+    if snap.recommender is None:
+        return {"results": [[] for _ in body.queries]}
+    return await score_json(snap, None, run_batch, body.queries, body.top_n)
+
+def run_batch(snap, batch, top_n):
+    queries, masks, mask_cache = [], [], {}
+    with stage("prepare"):  # query correction and filter masks
+        for q in batch:
+            if q.ingredients:
+                queries.append(("ingredients", correct_query(snap, q.ingredients)[0]))
+            else:
+                queries.append(("recipe", q.recipe))
+
+            mask = None
+            if q.dietary or q.allergies:
+                # Queries with the same filters share one mask
+                key = (tuple(sorted(q.dietary or [])), tuple(sorted(q.allergies or [])))
+                if key not in mask_cache:
+                    mask_cache[key] = apply_dietary_filters(snap.store, q.dietary, q.allergies)
+                mask = mask_cache[key]
+            masks.append(mask)
+    return {"results": snap.recommender.recommend_batch(queries, top_n=top_n, masks=masks)}
+
+@app.get("/suggest")
+async def suggest(
+    prefix: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50)
 ):
-    base_recommendations = recommender.recommend_by_recipe(recipe)
-    
-    if dietary or allergies:
-        csv = load_csv()
-        if not csv.empty:
-            df = pd.DataFrame({
-                "name": csv["Name"],
-                "ingredients": csv["RecipeIngredientParts"].astype(str),
-            })
-            filtered_df = apply_dietary_filters(df, dietary, allergies)
-            
-            filtered_names = set(filtered_df["name"].tolist())
-            if hasattr(base_recommendations, 'recommendations'):
-                base_recommendations['recommendations'] = [
-                    rec for rec in base_recommendations['recommendations']
-                    if rec.get('name') in filtered_names
-                ]
-    
-    return base_recommendations
+    """Complete the last word of ``prefix`` from the ingredient vocabulary.
+
+    Falls back to the closest spellings when nothing starts with it.
+    """
+    matcher = snapshots.current.matcher
+    head, _, last = prefix.lower().rstrip().rpartition(" ")
+    if matcher is None or not last:
+        return {"prefix": prefix, "suggestions": [], "corrected": False}
+    words = matcher.complete(last, n=limit)
+    corrected = not words
+    if corrected:
+        words = matcher.get_close_matches(last, n=min(limit, 5))
+    head = f"{head} " if head else ""
+    return {"prefix": prefix, "suggestions": [head + w for w in words], "corrected": corrected}
+
+# ---- Admin ----
+@app.post("/admin/reload", status_code=202)
+def reload_corpus(wait: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """Rebuild store + index in the background and swap them in atomically."""
+    require_admin(x_admin_token)
+    started = snapshots.reload(wait=wait)
+    return {"started": started, **snapshots.status()}
+
+@app.get("/admin/reload")
+def reload_status(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return snapshots.status()
+
+@app.get("/admin/cache")
+def cache_stats(x_admin_token: Optional[str] = Header(None)):
+    """Hit/miss counters of this worker's response cache."""
+    require_admin(x_admin_token)
+    return response_cache.stats() if response_cache else {"backend": None}
+
+@app.get("/admin/pool")
+def pool_stats(x_admin_token: Optional[str] = Header(None)):
+    """Scoring pool occupancy and how many requests were turned away."""
+    require_admin(x_admin_token)
+    return scoring.stats()
+
+@app.delete("/admin/cache")
+def clear_cache(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    if response_cache is None:
+        return {"cleared": False, "removed": 0}
+    try:
+        removed = response_cache.clear()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Cache backend unavailable: {e}")
+    return {"cleared": True, "removed": removed}
 
 # New endpoint for dietary preferences
 @app.get("/dietary-options")
-def get_dietary_options():
+async def get_dietary_options():
+    store = snapshots.current.store
     return {
         "dietary": list(DIETARY_FILTERS.keys()),
         "allergies": list(ALLERGY_FILTERS.keys()),
-        "cuisines": ["italian", "asian", "mexican", "indian", "mediterranean", "american"]
+        # Tagged cuisines, most common first, with their recipe counts
+        "cuisines": list(store.cuisines),
+        "cuisineCounts": store.cuisines,
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Run from AI/: modules import ``utils.*``, and the API scripts live in api/
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [AI_DIR, os.path.join(AI_DIR, "api")]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utils.ann import ExactSearch, IVFSearch, make_search, parse_spec, recall_at_k
+from utils.ranking import top_k
+
+
+@pytest.fixture(scope="module")
+def matrix():
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(60)]
+    docs = [" ".join(rng.choice(words, size=8)) for _ in range(400)]
+    return TfidfVectorizer().fit_transform(docs).tocsr()
+
+
+def test_full_probe_ranks_like_exact(matrix):
+    exact = ExactSearch(matrix)
+    ivf = IVFSearch(matrix, dims=16, lists=8)
+    ivf.probe = ivf.lists
+    queries = matrix[:25]
+    for j, ((_, exact_scores), (rows, scores)) in enumerate(zip(exact.search(queries, 10),
+                                                                  ivf.search(queries, 10))):
+        assert sorted(rows.tolist()) == list(range(matrix.shape[0]))
+        expected = top_k(exact_scores, 10, ids=np.arange(matrix.shape[0]))
+        got = rows[top_k(scores, 10, ids=rows)]
+        np.testing.assert_array_equal(got, expected)
+
+    recall, exact_times, ivf_times = recall_at_k(exact, ivf, queries, 10)
+    assert recall == 1.0 and len(exact_times) == len(ivf_times) == 25
+
+
+def test_recall_drops_with_fewer_probes(matrix):
+    ivf = IVFSearch(matrix, dims=16, lists=8, probe=1)
+    recall, _, _ = recall_at_k(ExactSearch(matrix), ivf, matrix[:25], 10)
+    assert 0.0 < recall < 1.0
+
+
+def test_parse_spec():
+    assert parse_spec(None) == ("exact", {})
+    assert parse_spec("exact") == ("exact", {})
+    assert parse_spec("ivf:dims=64, probe=16,rerank=no,seed=0") == (
+        "ivf", {"dims": 64, "probe": 16, "rerank": False, "seed": 0})
+    for spec, message in [("hnsw:m=16", "Unknown ANN backend"),
+                          ("ivf:prob=16", "Unknown ANN option 'prob'"),
+                          ("ivf:probe=sixteen", "needs an integer"),
+                          ("ivf:probe", "needs an integer"),
+                          ("ivf:lists=0", "must be positive")]:
+        with pytest.raises(ValueError, match=message):
+            parse_spec(spec)
+
+
+def test_make_search_rejects_a_bad_spec_before_building(matrix):
+    assert isinstance(make_search(matrix, ""), ExactSearch)
+    with pytest.raises(ValueError, match="Unknown ANN option"):
+        make_search(matrix, "ivf:prob=16")
@@ -0,0 +1,144 @@
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sklearn")
+from fastapi.testclient import TestClient
+
+# Two signature ingredients tag a recipe (utils.cuisine.THRESHOLD)
+EXTRA = {1: ', ""parmesan"", ""basil""', 2: ', ""pesto"", ""ricotta""', 3: ', ""tofu"", ""miso""'}
+CSV = (
+    "RecipeId,Name,RecipeIngredientParts,RecipeInstructions,TotalTime,Calories,Images,AggregatedRating\n"
+    + "".join(f'{i},Dish {i},"c(""leek"", ""salt""{EXTRA.get(i, "")})",Cook,PT10M,100,,4\n' for i in range(1, 6))
+)
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("api")
+    (tmp / "recipes.csv").write_text(CSV, encoding="utf-8")
+    # The API reads its configuration at import time; restored for later modules
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv("COOKMATE_CSV", str(tmp / "recipes.csv"))
+        env.setenv("COOKMATE_INDEX_DIR", str(tmp / "index"))
+        env.setenv("COOKMATE_ADMIN_TOKEN", "secret")
+        import api
+
+        with TestClient(api.app) as client:
+            deadline = time.time() + 60
+            while client.get("/ready").status_code != 200 and time.time() < deadline:
+                time.sleep(0.05)
+            yield client
+
+
+def test_recipe_ids_outside_int64(client):
+    assert client.get("/recipe/3").status_code == 200
+    assert client.get("/recipe/99999999999999999999").status_code == 404
+    response = client.get("/recipes", params={"ids": "3,99999999999999999999"})
+    assert response.status_code == 422
+    assert client.get("/recipes", params={"ids": "3,999"}).json()["missing"] == [999]
+
+
+def test_admin_routes_need_the_token(client):
+    assert client.get("/admin/reload").status_code == 403
+    assert client.get("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/reload", headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+def test_admin_routes_are_disabled_without_a_token(client, monkeypatch):
+    import api
+
+    monkeypatch.setattr(api, "ADMIN_TOKEN", None)
+    assert client.get("/admin/reload").status_code == 403
+    assert client.delete("/admin/cache", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_profiling_needs_the_token(client, monkeypatch):
+    import api
+
+    params = {"user_id": 1, "ingredients": "leek", "profile": 1}
+    assert client.get("/search", params=params).status_code == 403
+    response = client.get("/search", params=params, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200 and "function calls" in response.text
+
+    monkeypatch.setattr(api, "ADMIN_TOKEN", None)
+    assert client.get("/search", params=params, headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_refused_profiling_keeps_cors_headers(client):
+    response = client.get("/search", params={"user_id": 1, "ingredients": "leek", "profile": 1},
+                          headers={"Origin": "https://app.example"})
+    assert response.status_code == 403
+    assert response.headers["access-control-allow-origin"] in ("*", "https://app.example")
+
+
+def test_clear_cache_reports_removed_entries(client):
+    assert client.get("/search", params={"user_id": 1, "ingredients": "tomato"}).status_code == 200
+    body = client.delete("/admin/cache", headers={"X-Admin-Token": "secret"}).json()
+    assert body["cleared"] is True and body["removed"] >= 1
+    assert client.get("/admin/cache", headers={"X-Admin-Token": "secret"}).json()["entries"] == 0
+
+
+def test_search_range_bounds(client):
+    def found(**bounds):
+        params = {"user_id": 1, "ingredients": "leek", "autocorrect": False, **bounds}
+        return len(client.get("/search", params=params).json()["data"])
+
+    assert found() == 5
+    assert found(max_calories=0) == 0  # zero is a bound, not "unset"
+    assert found(min_calories=100, max_calories=100) == 5
+    assert found(min_calories=100, max_cook_time=5) == 0
+    assert found(max_cook_time=10) == 5
+    assert found(min_protein=0) == 0  # no protein column: every value is missing
+
+
+def test_dietary_options_list_tagged_cuisines(client):
+    body = client.get("/dietary-options").json()
+    assert body["cuisines"] == ["italian", "asian"]
+    assert body["cuisineCounts"] == {"italian": 2, "asian": 1}
+    found = client.get("/search", params={"user_id": 1, "ingredients": "leek", "cuisine": "Italian"}).json()
+    assert sorted(r["name"] for r in found["data"]) == ["Dish 1", "Dish 2"]
+
+
+def test_cached_search_reports_corrections_for_the_query_as_typed(client):
+    def corrections(query):
+        return list(client.get("/search", params={"user_id": 1, "ingredients": query}).json()["corrections"])
+
+    assert corrections("sallt parmesn") == ["sallt", "parmesn"]
+    # Same normalized query, so the ranking could be shared; the echoed corrections may not
+    assert corrections("parmesn sallt") == ["parmesn", "sallt"]
+    assert corrections("sallt parmesn") == ["sallt", "parmesn"]
+
+
+def test_saturated_scoring_pool_returns_503(client, monkeypatch):
+    import threading
+
+    import api
+    from utils.scoring_pool import ScoringPool
+
+    gate, started = threading.Event(), threading.Event()
+
+    def slow_search(snap, *args):
+        started.set()
+        gate.wait(5)
+        return {"status": "success", "data": []}
+
+    pool = ScoringPool("thread", workers=1, max_queue=0, queue_timeout=0.1)
+    monkeypatch.setattr(api, "scoring", pool)
+    monkeypatch.setattr(api, "run_search", slow_search)
+    monkeypatch.setattr(api, "response_cache", None)
+    params = {"user_id": 1, "ingredients": "leek"}
+    first = threading.Thread(target=lambda: client.get("/search", params=params))
+    first.start()
+    try:
+        assert started.wait(5)
+        response = client.get("/search", params=params)
+        assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    finally:
+        gate.set()
+        first.join()
+    assert client.get("/search", params=params).status_code == 200
+    assert pool.rejected == 1 and pool.in_flight == 0
+    pool.shutdown()
+
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from utils import build_nlp_words as nlp
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(nlp, "TERMS_PATH", str(tmp_path / "nlpTerms.tsv"))
+    monkeypatch.setattr(nlp, "IDS_PATH", str(tmp_path / "nlpTerms.ids.npy"))
+    monkeypatch.setattr(nlp, "OUT_PATH", str(tmp_path / "nlpWords.txt"))
+    return tmp_path
+
+
+def write_csv(path, rows):
+    rng = np.random.default_rng(0)
+    words = ["leek", "salt", "garlic", "onion", "tomato", "basil", "rice", "lemon", "the", "cup", "çilek"]
+    frame = pd.DataFrame({
+        "RecipeId": range(1, 61),
+        "Name": [f"Dish {' '.join(rng.choice(words, 2))}" for _ in range(60)],
+        "RecipeIngredientParts": [f'c("{rng.choice(words)}", "{rng.choice(words)} 2")' for _ in range(60)],
+        "RecipeInstructions": [" ".join(rng.choice(words, 5)) for _ in range(60)],
+    })
+    frame.iloc[:rows].to_csv(path, index=False)
+
+
+def test_incremental_matches_a_full_rebuild(paths):
+    csv_path = str(paths / "recipes.csv")
+    write_csv(csv_path, 25)
+    nlp.write_terms(*nlp.build_terms(csv_path, chunksize=7)[:2])
+
+    write_csv(csv_path, 60)  # 35 recipes appended
+    terms, ids, added = nlp.build_terms(csv_path, incremental=True, chunksize=7)
+    assert added == 35
+    full, full_ids, full_added = nlp.build_terms(csv_path, chunksize=60)
+    assert full_added == 60
+    pdt.assert_frame_equal(terms, full)
+    np.testing.assert_array_equal(np.sort(ids), full_ids)
+
+    nlp.write_terms(terms, ids)
+    incremental_words = (paths / "nlpWords.txt").read_text(encoding="utf-8")
+    pdt.assert_frame_equal(nlp.read_terms(nlp.TERMS_PATH), full)
+    # Nothing new: a second incremental run counts nothing and changes nothing
+    again, _, added = nlp.build_terms(csv_path, incremental=True)
+    assert added == 0
+    pdt.assert_frame_equal(again, full)
+
+    nlp.write_terms(full, full_ids)
+    assert (paths / "nlpWords.txt").read_text(encoding="utf-8") == incremental_words
@@ -0,0 +1,48 @@
+from fnmatch import fnmatchcase
+
+from utils.cache import MemoryCache, RedisCache, ResponseCache
+
+
+class RedisStandIn:
+    """The few Redis commands RedisCache uses, over a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def scan_iter(self, match="*", count=None):
+        yield from [k for k in list(self.data) if fnmatchcase(k, match)]
+
+    def delete(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+
+def redis_cache(client):
+    cache = RedisCache.__new__(RedisCache)
+    cache.client, cache.ttl, cache.prefix, cache.evictions = client, 300.0, "cookmate:", 0
+    return cache
+
+
+def test_redis_clear_deletes_only_prefixed_keys():
+    client = RedisStandIn()
+    cache = redis_cache(client)
+    for i in range(1203):
+        cache.set(f"v1|search|q{i}", b"{}")
+    client.set("other:app", b"keep")
+
+    assert cache.clear(batch=100) == 1203
+    assert client.data == {"other:app": b"keep"}
+    assert cache.get("v1|search|q0") is None
+
+
+def test_memory_clear_counts_entries():
+    cache = ResponseCache(MemoryCache(10, 60))
+    cache.backend.set("a", b"1")
+    cache.backend.set("b", b"2")
+    assert cache.clear() == 2
+    assert len(cache.backend) == 0
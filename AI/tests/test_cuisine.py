@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+from utils.corpus import build_corpus
+from utils.cuisine import CUISINE_IDS, THRESHOLD, UNTAGGED, cuisine_counts, tag_cuisines
+from utils.recipe_store import RecipeStore, build_arrays
+
+NAMES = {i: name for name, i in CUISINE_IDS.items()}
+
+
+def tag(names, ingredients, **columns):
+    raw = pd.DataFrame({"Name": names, "RecipeIngredientParts": ingredients, **columns})
+    return [NAMES.get(int(i)) for i in tag_cuisines(raw)]
+
+
+def test_threshold_needs_a_marker_or_two_ingredients():
+    assert THRESHOLD == 2.0
+    assert tag(["Pasta Bake", "Pasta Bake", "Weeknight Dinner"],
+               ['c("pasta")', 'c("pasta", "basil")', 'c("salt")'],
+               Keywords=["", "", "Italian"]) == [None, "italian", "italian"]
+    assert tag(["Soup", "Soup"], ['c("basil")', None]) == [None, None]
+    # A lower threshold lets one ingredient through
+    raw = pd.DataFrame({"Name": ["Soup"], "RecipeIngredientParts": ['c("basil")']})
+    assert tag_cuisines(raw, threshold=1.0).tolist() == [CUISINE_IDS["italian"]]
+    assert tag_cuisines(raw.iloc[:0]).tolist() == []
+
+
+def test_multi_word_signatures_match_as_ngrams():
+    # "soy sauce" and "sesame oil" are bigrams, "cream of mushroom soup" a 4-gram (beyond (1, 3))
+    assert tag(["Stir Fry"], ['c("soy sauce", "sesame oil")']) == ["asian"]
+    assert tag(["Stir Fry"], ['c("soy", "sauce", "oil")']) == [None]
+    assert tag(["Casserole"], ['c("cream of mushroom soup", "bacon")']) == [None]
+    assert tag(["Tacos"], ['c("Jalapeño", "tortillas")']) == ["mexican"]  # accents stripped
+
+
+def test_cuisine_counts_most_common_first():
+    ids = np.array([2, 0, 2, UNTAGGED, 2, 0, 5], dtype=np.int8)
+    names = list(CUISINE_IDS)
+    assert cuisine_counts(ids) == {names[2]: 3, names[0]: 2, names[5]: 1}
+    assert cuisine_counts(np.array([UNTAGGED], dtype=np.int8)) == {}
+
+
+def test_cuisine_mask_falls_back_to_recipe_names(tmp_path):
+    csv_path = str(tmp_path / "recipes.csv")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("RecipeId,Name,RecipeIngredientParts,RecipeInstructions\n"
+                '1,Greek Salad,"c(""feta"", ""kalamata"")",Toss\n'
+                '2,French Onion Soup,"c(""onion"")",Simmer\n'
+                '3,Basil Pesto,"c(""basil"", ""parmesan"")",Blend\n')
+    build_corpus(csv_path)
+    build_arrays(csv_path)
+    store = RecipeStore.load(csv_path)
+
+    assert store.ids[store.cuisine_mask(["Mediterranean"])].tolist() == [1]
+    assert store.ids[store.cuisine_mask(["french"])].tolist() == [2]  # not a tagged cuisine
+    assert store.ids[store.cuisine_mask(["french", "italian", " "])].tolist() == [2, 3]
+    assert not store.cuisine_mask(["klingon"]).any()
+    assert store.cuisines == {"mediterranean": 1, "italian": 1}
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from utils.dietary import TermBitmaps
+
+RECIPES = pd.DataFrame({
+    "name": ["Wheat Bread", "Cheese Omelette", "Green Salad", "Walnut Cake"],
+    "ingredients": ["flour, water", "EGG, cheese", "lettuce, oil", "walnut, egg"],
+})
+
+
+def kept(dietary=None, allergies=None):
+    bitmaps = TermBitmaps(TermBitmaps.scan(RECIPES))
+    return RECIPES["name"][bitmaps.mask(dietary, allergies)].tolist()
+
+
+def test_hyphenated_dietary_keys_match():
+    for spelling in ("gluten-free", "Gluten Free", "glutenfree"):
+        assert kept(dietary=[spelling]) == ["Cheese Omelette", "Green Salad", "Walnut Cake"]
+    assert kept(dietary=["dairy-free", "gluten-free"]) == ["Green Salad", "Walnut Cake"]
+
+
+def test_allergy_exclusion():
+    assert kept(allergies=["eggs"]) == ["Wheat Bread", "Green Salad"]
+    assert kept(allergies=["Nuts", "eggs"]) == ["Wheat Bread", "Green Salad"]
+
+
+def test_unknown_keys_filter_nothing():
+    assert kept(dietary=["carnivore"], allergies=["pollen"]) == RECIPES["name"].tolist()
@@ -0,0 +1,39 @@
+from utils.fuzzy import FuzzyMatcher
+
+VOCABULARY = ["chicken", "eggs", "garlic", "onion", "tomato"]
+
+
+def test_correct_keeps_numbers_and_punctuation():
+    matcher = FuzzyMatcher(VOCABULARY)
+    text, corrections = matcher.correct("Chiken 2 eggs, 1/2 onoin")
+    assert corrections == {"chiken": "chicken", "onoin": "onion"}
+    assert text == "chicken 2 eggs, 1/2 onion"
+
+
+def test_correct_returns_text_unchanged_without_corrections():
+    matcher = FuzzyMatcher(VOCABULARY)
+    assert matcher.correct("3 eggs + garlic") == ("3 eggs + garlic", {})
+
+
+def test_get_close_matches_matches_difflib():
+    import difflib
+    import random
+
+    rng = random.Random(0)
+    words = sorted({"".join(rng.choice("abcde") for _ in range(rng.randint(1, 7))) for _ in range(300)})
+    words += ["bat", "cat", "hat", "abcd", "abce"]  # ties on score; "abce" vs "abcd" is exactly 0.75
+    matcher = FuzzyMatcher(words)
+    vocabulary = matcher.words
+    queries = ["at", "abcd", "xyz", "a"] + [rng.choice(vocabulary)[::-1] + rng.choice("abcdex") for _ in range(200)]
+    for query in queries:
+        for n, cutoff in ((1, 0.6), (3, 0.6), (5, 0.0), (3, 0.75), (10, 0.5), (2, 1.0)):
+            assert matcher.get_close_matches(query, n, cutoff) == difflib.get_close_matches(query, vocabulary, n, cutoff), (query, n, cutoff)
+
+
+def test_complete_is_prefix_filter():
+    matcher = FuzzyMatcher(["tomato", "tom", "toast", "onion", "tomatillo"])
+    assert matcher.complete("tom") == ["tom", "tomatillo", "tomato"]
+    assert matcher.complete("tom", n=1) == ["tom"]
+    weighted = FuzzyMatcher(["tomato", "tom", "tomatillo"], weights=[5, 1, 5])
+    assert weighted.complete("tom") == ["tomatillo", "tomato", "tom"]
+    assert matcher.complete("zz") == [] and matcher.complete("") == []
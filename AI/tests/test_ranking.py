@@ -0,0 +1,35 @@
+import numpy as np
+
+from utils.ranking import top_k
+
+
+def full_sort(scores, k, ratings=None, ids=None, mask=None):
+    """top_k by sorting every candidate on (score, rating, id, position)."""
+    rows = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+    keys = [rows]
+    if ids is not None:
+        keys.insert(0, ids[rows])
+    if ratings is not None:
+        keys.insert(0, -np.nan_to_num(ratings[rows], nan=-np.inf))
+    keys.insert(0, -scores[rows])
+    return rows[np.lexsort(keys[::-1])[:k]]
+
+
+def test_matches_a_full_sort_with_heavy_ties():
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        n, k = int(rng.integers(1, 60)), int(rng.integers(0, 70))
+        scores = rng.integers(0, 4, n) / 4 * (rng.random() < 0.7)  # often all zero
+        ratings = np.where(rng.random(n) < 0.2, np.nan, rng.integers(0, 3, n).astype(float))
+        ids = rng.integers(0, 5, n)
+        mask = rng.random(n) < 0.7 if rng.random() < 0.5 else None
+        for r, i in ((ratings, ids), (ratings, None), (None, ids), (None, None)):
+            assert np.array_equal(top_k(scores, k, r, i, mask), full_sort(scores, k, r, i, mask))
+
+
+def test_fewer_matches_than_k_fill_from_the_zero_group():
+    scores = np.zeros(100_000)
+    scores[[7, 42]] = [0.5, 0.9]
+    ratings = np.zeros(100_000)
+    ratings[[3, 5, 11]] = [5.0, 4.0, 5.0]
+    assert top_k(scores, 5, ratings, np.arange(100_000)).tolist() == [42, 7, 3, 11, 5]
@@ -0,0 +1,44 @@
+import numpy as np
+
+from utils.corpus import build_corpus
+from utils.recipe_store import RecipeStore, build_arrays
+
+HEADER = "RecipeId,Name,RecipeIngredientParts,RecipeInstructions,TotalTime,CookTime,Calories,Images,AggregatedRating\n"
+ROWS = [
+    '1,Soup,"c(""leek"")",Cook,PT10M,,0,,4\n',         # zero calories
+    '2,Stew,"c(""beef"")",Cook,,PT45M,350,,4\n',       # no TotalTime: CookTime counts
+    '3,Salad,"c(""kale"")",Cook,PT1H5M,PT5M,,,4\n',    # missing calories
+    '4,Roast,"c(""lamb"")",Cook,,,800,,4\n',           # no time at all
+]
+
+
+def load_store(tmp_path):
+    csv_path = str(tmp_path / "recipes.csv")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write(HEADER + "".join(ROWS))
+    build_corpus(csv_path)
+    build_arrays(csv_path)
+    return RecipeStore.load(csv_path)
+
+
+def ids(store, mask):
+    return store.ids[mask].tolist()
+
+
+def test_range_mask(tmp_path):
+    store = load_store(tmp_path)
+    # TotalTime first, CookTime when it is missing
+    np.testing.assert_array_equal(store.numeric["cook_time"], [10, 45, 65, np.nan])
+
+    # Missing values fail every bound, whichever side is set
+    assert ids(store, store.range_mask({"calories": (0, None)})) == [1, 2, 4]
+    assert ids(store, store.range_mask({"cook_time": (None, 600)})) == [1, 2, 3]
+    # Zero is a bound, not "unset"
+    assert ids(store, store.range_mask({"calories": (None, 0)})) == [1]
+    # Both sides, and several bounds, combine
+    assert ids(store, store.range_mask({"calories": (100, 500)})) == [2]
+    assert ids(store, store.range_mask({"calories": (None, 400), "cook_time": (20, None)})) == [2]
+
+    out = np.array([False, True, True, True])
+    assert store.range_mask({"calories": (0, None)}, out=out) is out
+    assert ids(store, out) == [2, 4]
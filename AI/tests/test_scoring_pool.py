@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.scoring_pool import Overloaded, ScoringPool
+
+
+def blocked(snapshot, gate):
+    gate.wait(5)
+    return snapshot
+
+
+def test_saturated_pool_rejects_and_frees_its_slot():
+    async def scenario():
+        pool = ScoringPool("thread", workers=1, max_queue=1, queue_timeout=0.2)
+        gate = threading.Event()
+        running = asyncio.ensure_future(pool.run(blocked, "a", gate))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(pool.run(blocked, "b", gate))
+        await asyncio.sleep(0.05)
+        assert (pool.in_flight, pool.waiting) == (1, 1)
+
+        # Slot busy and queue full: turned away at once
+        with pytest.raises(Overloaded, match="queue is full"):
+            await pool.run(blocked, "c", gate)
+        # The queued job gives up after queue_timeout
+        with pytest.raises(Overloaded, match="no scoring slot"):
+            await queued
+        assert (pool.waiting, pool.rejected) == (0, 2)
+
+        gate.set()
+        assert await running == "a"
+        await asyncio.sleep(0)  # the done callback releases the slot on the loop
+        # Nothing leaked: the one slot serves the next job right away
+        assert await asyncio.wait_for(pool.run(blocked, "d", gate), 1) == "d"
+        assert pool.stats()["inFlight"] == 0 and pool.completed == 2
+        pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,168 @@
+import re
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+import seed_recipes
+from utils.corpus import build_corpus, read_corpus, read_recipe_csv_chunks
+
+CSV = (
+    "RecipeId,Name,RecipeIngredientParts,RecipeInstructions,TotalTime,CookTime,Calories,Images,AggregatedRating\n"
+    '1,Soup,"c(""leek"", ""salt"")",,PT1H,,120.5,,\n'
+    "2,Stew,,Stir well,,PT5M,,https://img/2.jpg,4.5\n"
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "recipes.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+
+def test_missing_text_is_null_from_csv_and_corpus(csv_path):
+    from_csv = seed_recipes.recipe_params(read_corpus(csv_path)).to_dict(orient="records")
+    build_corpus(csv_path)
+    from_corpus = seed_recipes.recipe_params(read_corpus(csv_path)).to_dict(orient="records")
+
+    assert from_csv == from_corpus
+    assert seed_recipes.content_hashes(from_csv) == seed_recipes.content_hashes(from_corpus)
+    assert from_csv[0]["inst"] is None and from_csv[0]["img"] is None and from_csv[0]["rating"] is None
+    assert from_csv[1]["ing"] is None and from_csv[1]["cal"] is None
+
+
+# ---- COPY path ----
+RECIPES_DDL = """
+    CREATE TABLE "Recipes" (
+        "RecipeId" INTEGER PRIMARY KEY, "Name" TEXT, "Ingredients" TEXT, "Instructions" TEXT,
+        "TotalTime" TEXT, "CookTime" TEXT, "Calories" REAL, "Images" TEXT, "AggregatedRating" REAL
+    )
+"""
+
+
+def parse_copy_csv(data: str, null: str):
+    """Rows of COPY ... (FORMAT csv) input, by Postgres rules: only an unquoted
+    field equal to the NULL marker is NULL; quoted fields may hold newlines."""
+    rows, row, field, quoted, in_quotes, i = [], [], [], False, False, 0
+    while i < len(data):
+        ch = data[i]
+        if in_quotes:
+            if ch == '"' and data[i + 1:i + 2] == '"':
+                field.append('"')
+                i += 1
+            elif ch == '"':
+                in_quotes = False
+            else:
+                field.append(ch)
+        elif ch == '"':
+            in_quotes = quoted = True
+        elif ch in ",\n":
+            value = "".join(field)
+            row.append(None if not quoted and value == null else value)
+            field, quoted = [], False
+            if ch == "\n":
+                rows.append(row)
+                row = []
+        else:
+            field.append(ch)
+        i += 1
+    return rows
+
+
+class PostgresStandIn:
+    """Just enough of a Postgres connection for ``copy_batch``, backed by SQLite."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.connection = self  # conn.connection.cursor() is this object too
+
+    def cursor(self):
+        return self
+
+    def execute(self, clause, params=None):
+        sql = str(clause)
+        if sql.startswith("CREATE TEMP TABLE"):
+            sql = 'CREATE TEMP TABLE IF NOT EXISTS seed_staging AS SELECT * FROM "Recipes" WHERE 0'
+        elif sql.startswith("TRUNCATE"):
+            sql = "DELETE FROM seed_staging"
+        else:  # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT
+            sql = sql.replace("FROM seed_staging ON CONFLICT", "FROM seed_staging WHERE true ON CONFLICT")
+        return self.conn.execute(sqlalchemy.text(sql), params or {})
+
+    def copy_expert(self, sql, buf):
+        options = re.search(r"\((.*)\) FROM STDIN WITH \((.*)\)$", sql)
+        columns = options.group(1)
+        null = re.search(r"NULL '([^']*)'", options.group(2))
+        rows = parse_copy_csv(buf.read(), null.group(1) if null else "")
+        names = [f"c{j}" for j in range(len(rows[0]))]
+        self.conn.execute(
+            sqlalchemy.text(f"INSERT INTO seed_staging ({columns}) VALUES ({', '.join(':' + n for n in names)})"),
+            [dict(zip(names, row)) for row in rows],
+        )
+
+
+def table(conn):
+    return conn.execute(sqlalchemy.text('SELECT * FROM "Recipes" ORDER BY "RecipeId"')).all()
+
+
+def test_copy_writes_nulls_like_the_values_path(csv_path):
+    df = read_corpus(csv_path)
+    # Quotes, commas, newlines and a literal \N must survive as text
+    df.loc[0, "RecipeInstructions"] = 'Say "hi", then\nwait \\N'
+    rows = seed_recipes.recipe_params(df).to_dict(orient="records")
+
+    values_engine = sqlalchemy.create_engine("sqlite://")
+    with values_engine.begin() as conn:
+        conn.execute(sqlalchemy.text(RECIPES_DDL))
+    seed_recipes.seed(values_engine, [df], method="values")
+
+    copy_engine = sqlalchemy.create_engine("sqlite://")
+    with copy_engine.begin() as conn:
+        conn.execute(sqlalchemy.text(RECIPES_DDL))
+        seed_recipes.copy_batch(PostgresStandIn(conn), rows)
+        copied = table(conn)
+    with values_engine.connect() as conn:
+        assert copied == table(conn)
+
+    soup, stew = copied
+    assert soup.Instructions == 'Say "hi", then\nwait \\N'
+    assert soup.CookTime is None and soup.Images is None and soup.AggregatedRating is None
+    assert stew.Ingredients is None and stew.Calories is None and stew.AggregatedRating == 4.5
+
+
+def test_copy_upserts_changed_rows(csv_path):
+    rows = seed_recipes.recipe_params(read_corpus(csv_path)).to_dict(orient="records")
+    engine = sqlalchemy.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(sqlalchemy.text(RECIPES_DDL))
+        seed_recipes.copy_batch(PostgresStandIn(conn), rows)
+        rows[1] = {**rows[1], "name": "Better stew", "cal": 300.0}
+        seed_recipes.copy_batch(PostgresStandIn(conn), rows, update=True)
+        stew = table(conn)[1]
+    assert (stew.Name, stew.Calories) == ("Better stew", 300.0)
+
+
+# ---- Streaming ----
+def test_seed_streams_csv_chunks(csv_path):
+    engine = sqlalchemy.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(sqlalchemy.text(RECIPES_DDL))
+
+    def chunks():
+        return read_recipe_csv_chunks(csv_path, 1, columns=seed_recipes.SOURCE_COLUMNS)
+
+    assert seed_recipes.seed(engine, chunks(), incremental=True, method="values") == 2
+    corpus_engine = sqlalchemy.create_engine("sqlite://")
+    with corpus_engine.begin() as conn:
+        conn.execute(sqlalchemy.text(RECIPES_DDL))
+    seed_recipes.seed(corpus_engine, [read_corpus(csv_path)], method="values")
+    with engine.connect() as streamed, corpus_engine.connect() as whole:
+        assert table(streamed) == table(whole)
+
+    # Unchanged recipes are skipped; an edited one is upserted
+    assert seed_recipes.seed(engine, chunks(), incremental=True, method="values") == 0
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("x,Broken id,,,,,,,\n3,Pie,,,,,,,\n")
+    assert seed_recipes.seed(engine, chunks(), incremental=True, method="values") == 1
+    with engine.connect() as conn:
+        assert [row.Name for row in table(conn)] == ["Soup", "Stew", "Pie"]
@@ -0,0 +1,59 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("sklearn")
+import numpy as np
+
+from utils.corpus import build_corpus
+from utils.neighbours import NEIGHBOURS, build_neighbours
+from utils.recipe_store import RecipeStore, build_arrays
+from utils.search_index import INGREDIENT_INDEX, SearchIndex
+from utils.snapshot import build_snapshot
+
+HEADER = "RecipeId,Name,RecipeIngredientParts,RecipeInstructions,TotalTime,Calories,Images,AggregatedRating\n"
+
+
+def write_csv(path, ingredient):
+    rows = [f'{i},Dish {i},"c(""{ingredient if i == 1 else "rice"}"", ""salt"")",Cook,PT10M,100,,4\n'
+            for i in range(1, 6)]
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+
+
+def build_artifacts(csv_path, index_dir):
+    build_corpus(csv_path)
+    build_arrays(csv_path)
+    store = RecipeStore.load(csv_path)
+    SearchIndex.build(store).save(index_dir)
+    SearchIndex.build(store, text="ingredients").save(os.path.join(index_dir, INGREDIENT_INDEX))
+
+
+def test_reload_rebuilds_an_index_built_from_an_older_csv(tmp_path):
+    csv_path, index_dir = tmp_path / "recipes.csv", str(tmp_path / "index")
+    write_csv(csv_path, "leek")
+    build_artifacts(str(csv_path), index_dir)
+    before = build_snapshot(str(csv_path), index_dir)
+    assert before.search_index.score("leek")[0] > 0
+
+    # Fix an ingredient in place: same ids, same row count, newer CSV
+    time.sleep(0.01)
+    write_csv(csv_path, "fennel")
+    after = build_snapshot(str(csv_path), index_dir)
+    assert after.search_index.score("fennel")[0] > 0
+    assert after.recommender.recommend_by_ingredients("fennel", top_n=1)[0]["Name"] == "Dish 1"
+    assert not SearchIndex.load(index_dir).matches(after.store)
+
+
+def test_neighbours_are_read_from_the_configured_index_dir(tmp_path):
+    csv_path, index_dir = tmp_path / "recipes.csv", str(tmp_path / "index")
+    write_csv(csv_path, "leek")
+    build_artifacts(str(csv_path), index_dir)
+    snapshot = build_snapshot(str(csv_path), index_dir)
+    assert snapshot.recommender.neighbours is None
+
+    serial = build_neighbours(snapshot.recommender, k=3)
+    pooled = build_neighbours(snapshot.recommender, k=3, block=2, workers=2)
+    np.testing.assert_array_equal(serial.rows, pooled.rows)
+    serial.save(os.path.join(index_dir, NEIGHBOURS))
+    assert build_snapshot(str(csv_path), index_dir).recommender.neighbours is not None
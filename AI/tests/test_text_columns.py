@@ -0,0 +1,47 @@
+import numpy as np
+
+from utils.text_columns import TextColumn, TextLists
+
+
+def test_contains_rejects_matches_spanning_two_values():
+    column = TextColumn.encode(["ab", "cd", "xbcx"])
+    assert column.contains("bc").tolist() == [False, False, True]
+    assert column.contains("abcd").tolist() == [False, False, False]
+
+
+def test_contains_keeps_scanning_after_a_hit():
+    column = TextColumn.encode(["aaaa", "a", "baa", ""])
+    assert column.contains("aa").tolist() == [True, False, True, False]
+
+
+def test_multibyte_values():
+    values = ["çorba", "köfte", "", "mantı", "İskender 🍖"]
+    column = TextColumn.encode(values)
+    assert [column[i] for i in range(len(column))] == values
+    assert column.values().tolist() == values
+    assert column.contains("öf").tolist() == [False, True, False, False, False]
+    assert column.contains("🍖").tolist() == [False, False, False, False, True]
+    # UTF-8 offsets are bytes: "ç" is two, "🍖" four
+    assert column.offsets.tolist() == [0, 6, 12, 12, 18, 32]
+
+
+def test_dedupe_codes_round_trip():
+    values = ["pt10m", "pt1h", "pt10m", "", "pt1h", "pt10m"]
+    column = TextColumn.encode(values, dedupe=True)
+    assert column.values().tolist() == ["pt10m", "pt1h", ""]
+    assert column.codes.tolist() == [0, 1, 0, 2, 1, 0]
+    assert len(column) == len(values) and [column[i] for i in range(len(column))] == values
+    assert column.series().tolist() == values
+    # The mask is per row, not per distinct value
+    assert column.contains("1h").tolist() == [False, True, False, False, True, False]
+
+    reloaded = TextColumn.from_arrays(column.arrays("cook"), "cook")
+    assert [reloaded[i] for i in range(len(reloaded))] == values
+    assert set(column.arrays("cook")) == {"cook_blob", "cook_offsets", "cook_codes"}
+
+
+def test_lists_round_trip():
+    lists = TextLists.encode(["salt", "leek", "salt", "çilek"], [0, 2, 2, 4])
+    restored = TextLists.from_arrays(lists.arrays("ing"), "ing")
+    assert [restored[i] for i in range(len(restored))] == [["salt", "leek"], [], ["salt", "çilek"]]
+    np.testing.assert_array_equal(restored.items.codes, [0, 1, 0, 2])
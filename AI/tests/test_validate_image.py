@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("requests")
+from utils.validate_image import FALLBACK_IMAGE, validate_and_fix_csv, validate_urls
+
+SLOW_SECONDS = 2.0
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """/ok* answer 200, /get-only refuses HEAD, /slow outlives the client timeout, the rest 404."""
+
+    hits = Counter()
+
+    def respond(self, method):
+        self.hits[self.path] += 1
+        if self.path == "/slow":
+            time.sleep(SLOW_SECONDS)
+        if self.path.startswith("/ok") or (self.path == "/get-only" and method == "GET"):
+            status = 200
+        elif self.path == "/get-only":
+            status = 405
+        else:
+            status = 404
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.respond("HEAD")
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    ImageHandler.hits.clear()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_validate_urls_checks_each_url_once(server, tmp_path):
+    urls = {name: f"{server}/{name}" for name in ("ok", "missing", "slow", "get-only")}
+    checkpoint = tmp_path / "check.jsonl"
+
+    results = validate_urls(list(urls.values()) * 3, workers=8, per_host=4, rate=0, timeout=0.5,
+                            checkpoint_path=str(checkpoint))
+
+    assert results == {urls["ok"]: True, urls["missing"]: False, urls["slow"]: False, urls["get-only"]: True}
+    assert ImageHandler.hits["/ok"] == 1 and ImageHandler.hits["/missing"] == 1
+    recorded = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+    assert {entry["url"]: entry["ok"] for entry in recorded} == results
+
+
+def test_concurrent_fix_resumes_from_checkpoint(server, tmp_path):
+    checkpoint = tmp_path / "check.jsonl"
+    done = {f"{server}/ok": True, f"{server}/missing": False, f"{server}/slow": False}
+    checkpoint.write_text("".join(json.dumps({"url": u, "ok": ok}) + "\n" for u, ok in done.items())
+                          + '{"url": "torn', encoding="utf-8")
+    csv_path = tmp_path / "recipes.csv"
+    images = [f'c("{server}/ok")', f"{server}/missing", f"{server}/slow", "", f"{server}/ok-new"]
+    pd.DataFrame({"RecipeId": range(1, 6), "Name": [f"Dish {i}" for i in range(1, 6)],
+                  "Images": images}).to_csv(csv_path, index=False)
+
+    df = validate_and_fix_csv(str(csv_path), concurrent=True, workers=4, rate=0,
+                              checkpoint_path=str(checkpoint))
+
+    assert df["Images"].tolist() == [f"{server}/ok", FALLBACK_IMAGE, FALLBACK_IMAGE, FALLBACK_IMAGE,
+                                     f"{server}/ok-new"]
+    # Only the URL missing from the checkpoint was requested, and it is now recorded
+    assert dict(ImageHandler.hits) == {"/ok-new": 1}
+    assert validate_urls([f"{server}/ok-new"], checkpoint_path=str(checkpoint)) == {**done, f"{server}/ok-new": True}
+    assert dict(ImageHandler.hits) == {"/ok-new": 1}
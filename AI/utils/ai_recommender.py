@@ -1,28 +1,115 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+import scipy.sparse as sp
+
+from utils.ann import make_search
+from utils.metrics import stage
+from utils.ranking import top_k
+from utils.recipe_store import RecipeStore
+from utils.search_index import SearchIndex
+
 
 class RecipeRecommender:
-    def __init__(self, recipe_file="utils/updatedRecipe.csv"):
-        self.recipes = pd.read_csv(recipe_file, encoding="utf-8")
+    def __init__(self, recipe_file="utils/updatedRecipe.csv", store: RecipeStore = None, ann: str = None,
+                 index: SearchIndex = None):
+        self.neighbours = None  # optional NeighbourTable, see utils.neighbours
+        # Share the already-loaded corpus when the API hands us one
+        self.store = store if store is not None else RecipeStore.load(recipe_file)
+
+        # Prebuilt ingredients-only TF-IDF (mmapped, see utils.search_index), else fitted here
+        self.index = index if index is not None else SearchIndex.build(self.store, text="ingredients")
+        self.tfidf_matrix = self.index.matrix
+        # Exact cosine by default; an ANN spec (see utils.ann) for large corpora
+        self.search = make_search(self.tfidf_matrix, ann, postings=self.index.postings)
+        self._ratings = self.store.ratings
+        self._ids = self.store.ids
 
-        # ✅ Use the right column for ingredients
-        self.ingredient_col = "RecipeIngredientParts"
+    def _top(self, rows, sim_scores, top_n, mask):
+        """Best rows overall; ``rows`` are the candidates scored (None: every row)."""
+        if rows is None:
+            return top_k(sim_scores, top_n, ratings=self._ratings, ids=self._ids, mask=mask)
+        chosen = top_k(sim_scores, top_n, ratings=self._ratings[rows], ids=self._ids[rows],
+                       mask=None if mask is None else mask[rows])
+        return rows[chosen]
 
-        self.tfidf = TfidfVectorizer(stop_words="english")
-        self.tfidf_matrix = self.tfidf.fit_transform(self.recipes[self.ingredient_col].astype(str))
+    def _records(self, indices):
+        # Decoded from the store's text blobs for the returned rows only
+        names, ingredients = self.store.names, self.store.ingredients
+        return [{"Name": names[i], "RecipeIngredientParts": ingredients[i]} for i in np.asarray(indices).tolist()]
 
-    def recommend_by_recipe(self, recipe_title, top_n=5):
-        try:
-            idx = self.recipes[self.recipes['Name'].str.lower() == recipe_title.lower()].index[0]
-        except IndexError:
+    def _precomputed(self, idx, top_n, mask):
+        if self.neighbours is None:
+            return None
+        return self.neighbours.lookup(idx, top_n, mask)
+
+    def recommend_by_recipe(self, recipe_title, top_n=5, mask=None):
+        with stage("lookup"):
+            idx = self.store.title_row(recipe_title)
+            rows = self._precomputed(idx, top_n, mask) if idx is not None else None
+        if idx is None:
             return []
-        sim_scores = cosine_similarity(self.tfidf_matrix[idx], self.tfidf_matrix).flatten()
-        top_indices = sim_scores.argsort()[-top_n-1:-1][::-1]
-        return self.recipes.iloc[top_indices][['Name', self.ingredient_col]].to_dict(orient="records")
-
-    def recommend_by_ingredients(self, ingredients, top_n=5):
-        query_vec = self.tfidf.transform([ingredients])
-        sim_scores = cosine_similarity(query_vec, self.tfidf_matrix).flatten()
-        top_indices = sim_scores.argsort()[-top_n:][::-1]
-        return self.recipes.iloc[top_indices][['Name', self.ingredient_col]].to_dict(orient="records")
+        if rows is None:
+            mask = np.ones(len(self.store), dtype=bool) if mask is None else mask.copy()
+            mask[idx] = False  # never recommend the recipe itself
+            with stage("similarity"):
+                rows, sim_scores = self.search.search(self.tfidf_matrix[idx], top_n, [mask])[0]
+            with stage("rank"):
+                rows = self._top(rows, sim_scores, top_n, mask)
+        with stage("records"):
+            return self._records(rows)
+
+    def recommend_by_ingredients(self, ingredients, top_n=5, mask=None):
+        with stage("vectorize"):
+            query_vec = self.index.transform([ingredients])
+        with stage("similarity"):
+            rows, sim_scores = self.search.search(query_vec, top_n, [mask])[0]
+        with stage("rank"):
+            chosen = self._top(rows, sim_scores, top_n, mask)
+        with stage("records"):
+            return self._records(chosen)
+
+    def recommend_batch(self, queries, top_n=5, masks=None):
+        """Top-n recommendations for many queries with one search call.
+
+        ``queries`` is a list of ``("ingredients", text)`` or ``("recipe", title)``
+        pairs and ``masks`` an optional per-query list of row masks (None means
+        unfiltered). Results come back in query order; unknown titles give [].
+        """
+        masks = masks or [None] * len(queries)
+        results = [[] for _ in queries]
+
+        ing_pos = [i for i, (kind, _) in enumerate(queries) if kind == "ingredients"]
+        rec_pos, rec_rows = [], []
+        for i, (kind, text) in enumerate(queries):
+            idx = self.store.title_row(text) if kind == "recipe" else None
+            if idx is not None:
+                rows = self._precomputed(idx, top_n, masks[i])
+                if rows is not None:
+                    results[i] = self._records(rows)
+                    continue
+                rec_pos.append(i)
+                rec_rows.append(idx)
+        if not ing_pos and not rec_pos:
+            return results
+
+        blocks = []
+        with stage("vectorize"):
+            if ing_pos:
+                blocks.append(self.index.transform([queries[i][1] for i in ing_pos]))
+            if rec_pos:
+                blocks.append(self.tfidf_matrix[rec_rows])
+
+        order, query_masks = ing_pos + rec_pos, []
+        for j, pos in enumerate(order):
+            mask = masks[pos]
+            if j >= len(ing_pos):
+                mask = np.ones(len(self.store), dtype=bool) if mask is None else mask.copy()
+                mask[rec_rows[j - len(ing_pos)]] = False
+            query_masks.append(mask)
+
+        # Rows are L2-normalized, so one (Q x N) sparse product gives every cosine
+        with stage("similarity"):
+            found = self.search.search(sp.vstack(blocks).tocsr(), top_n, query_masks)
+        with stage("rank"):
+            for pos, mask, (rows, sim_scores) in zip(order, query_masks, found):
+                results[pos] = self._records(self._top(rows, sim_scores, top_n, mask))
+        return results
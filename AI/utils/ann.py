@@ -0,0 +1,215 @@
+"""Similarity search backends for the recommender: exact and approximate.
+
+``ExactSearch`` scores a query against every TF-IDF row, as the recommender
+always did, but through a term-major copy of the matrix (an inverted index)
+so a query only walks the postings of its own terms. ``IVFSearch`` trades a
+little recall for sub-linear queries on large corpora:
+
+1. TruncatedSVD (LSA) projects the sparse TF-IDF rows to ``dims`` dense,
+   L2-normalized float32 vectors.
+2. Spherical k-means splits those vectors into ``lists`` inverted lists.
+3. A query only visits the ``probe`` lists whose centroids are closest to
+   it, and (with ``rerank``) the candidates get their exact sparse cosine, so
+   ranking among candidates matches the exact path.
+
+More ``probe`` means better recall and slower queries. Compare the two with::
+
+    python -m utils.ann --synthetic 200000 --probe 4,8,16,32
+"""
+import argparse
+import time
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+_BLOCK = 65536  # rows per block when assigning the corpus to lists
+
+
+class ExactSearch:
+    """Brute-force cosine similarity over the L2-normalized TF-IDF rows."""
+
+    def __init__(self, matrix, postings=None):
+        self.matrix = matrix
+        # `queries @ matrix.T` would convert the whole matrix on every call;
+        # prebuilt indexes ship the term-major copy (mmapped, shared by workers)
+        self.postings = postings if postings is not None else matrix.T.tocsr()
+
+    def search(self, queries, k, masks=None):
+        """Per query row: ``(rows, scores)``; ``rows`` is None when every row was scored."""
+        sims = (queries @ self.postings).tocsr()
+        return [(None, sims[j].toarray().ravel()) for j in range(sims.shape[0])]
+
+
+class IVFSearch:
+    """LSA vectors bucketed by spherical k-means (an inverted-file index)."""
+
+    def __init__(self, matrix, dims=128, lists=None, probe=None, rerank=True, seed=0, iterations=10):
+        n = matrix.shape[0]
+        self.matrix = matrix
+        self.rerank = rerank
+        self.lists = int(lists or max(1, round(np.sqrt(n))))
+        self.probe = int(probe or max(1, self.lists // 16))
+
+        dims = max(1, min(dims, matrix.shape[1] - 1, n - 1))
+        self.svd = TruncatedSVD(n_components=dims, random_state=seed)
+        self.vectors = normalize(self.svd.fit_transform(matrix)).astype(np.float32)
+        self.projection = np.ascontiguousarray(self.svd.components_.T, dtype=np.float32)
+        self.centroids = self._kmeans(self.vectors, min(self.lists, n), iterations, seed)
+        self.lists = len(self.centroids)
+
+        # Inverted lists as one permutation plus offsets (CSR-style)
+        assignment = self._assign(self.vectors)
+        self.order = np.argsort(assignment, kind="stable").astype(np.int64)
+        self.offsets = np.zeros(self.lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=self.lists), out=self.offsets[1:])
+
+    @staticmethod
+    def _kmeans(vectors, k, iterations, seed):
+        rng = np.random.default_rng(seed)
+        # A sample is plenty to place the centroids; every row is assigned after
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), 64 * k), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=k, replace=False)].copy()
+        for _ in range(iterations):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = normalize(sums).astype(np.float32)
+        return centroids
+
+    def _assign(self, vectors):
+        return np.concatenate([
+            np.argmax(vectors[i:i + _BLOCK] @ self.centroids.T, axis=1)
+            for i in range(0, len(vectors), _BLOCK)
+        ]) if len(vectors) else np.zeros(0, dtype=np.intp)
+
+    def embed(self, queries) -> np.ndarray:
+        """LSA vectors for sparse query rows, gathering only their terms' projections."""
+        queries = queries.tocsr()
+        dense = np.zeros((queries.shape[0], self.projection.shape[1]), dtype=np.float32)
+        for j in range(queries.shape[0]):
+            start, end = queries.indptr[j], queries.indptr[j + 1]
+            dense[j] = queries.data[start:end].astype(np.float32) @ self.projection[queries.indices[start:end]]
+        return normalize(dense)
+
+    def _rows(self, lists):
+        return np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+
+    def search(self, queries, k, masks=None):
+        """Per query row: ``(rows, scores)`` over the probed lists only.
+
+        When a mask leaves fewer than ``k`` allowed candidates the probe is
+        doubled until it does (or every list has been visited).
+        """
+        masks = masks or [None] * queries.shape[0]
+        dense = self.embed(queries)
+        ranked_lists = np.argsort(-(dense @ self.centroids.T), axis=1)
+        results = []
+        for j, mask in enumerate(masks):
+            probe = self.probe
+            while True:
+                rows = self._rows(ranked_lists[j, :probe])
+                allowed = len(rows) if mask is None else int(mask[rows].sum())
+                if allowed >= k or probe >= self.lists:
+                    break
+                probe *= 2
+            if self.rerank:
+                scores = (self.matrix[rows] @ queries[j].T).toarray().ravel()
+            else:
+                scores = self.vectors[rows] @ dense[j]
+            results.append((rows, scores))
+        return results
+
+
+# IVFSearch options an ANN spec may set
+IVF_OPTIONS = {"dims": int, "lists": int, "probe": int, "iterations": int, "seed": int, "rerank": bool}
+
+
+def parse_spec(spec):
+    """``(kind, kwargs)`` for an ANN spec string; ValueError naming the bad part otherwise."""
+    if not spec or spec == "exact":
+        return "exact", {}
+    kind, _, params = spec.partition(":")
+    if kind != "ivf":
+        raise ValueError(f"Unknown ANN backend {kind!r} in {spec!r} (use 'exact' or 'ivf')")
+    kwargs = {}
+    for item in filter(None, params.split(",")):
+        key, _, value = (part.strip() for part in item.partition("="))
+        if key not in IVF_OPTIONS:
+            raise ValueError(f"Unknown ANN option {key!r} in {spec!r}; expected one of {', '.join(IVF_OPTIONS)}")
+        if IVF_OPTIONS[key] is bool:
+            kwargs[key] = value.lower() in ("1", "true", "yes")
+            continue
+        try:
+            kwargs[key] = int(value)
+        except ValueError:
+            raise ValueError(f"ANN option {key!r} in {spec!r} needs an integer, got {value!r}") from None
+        if kwargs[key] < 0 or (kwargs[key] == 0 and key != "seed"):
+            raise ValueError(f"ANN option {key!r} in {spec!r} must be positive, got {value!r}")
+    return kind, kwargs
+
+
+def make_search(matrix, spec=None, postings=None):
+    """Backend for an ANN spec string such as ``"ivf:dims=128,lists=512,probe=16"``.
+
+    Empty, None or ``"exact"`` gives ``ExactSearch`` (over ``postings`` when given).
+    """
+    kind, kwargs = parse_spec(spec)
+    if kind == "exact":
+        return ExactSearch(matrix, postings)
+    return IVFSearch(matrix, **kwargs)
+
+
+# ---- Benchmark ----
+def recall_at_k(exact, approx, queries, k, masks=None):
+    """Mean recall@k of ``approx`` against ``exact`` plus per-query latencies (s)."""
+    from utils.ranking import top_k
+
+    def ranked(backend):
+        out, times = [], []
+        for j in range(queries.shape[0]):
+            started = time.perf_counter()
+            rows, scores = backend.search(queries[j], k, None if masks is None else [masks[j]])[0]
+            mask = None if masks is None else (masks[j] if rows is None else masks[j][rows])
+            chosen = top_k(scores, k, mask=mask)
+            times.append(time.perf_counter() - started)
+            out.append(set((chosen if rows is None else rows[chosen]).tolist()))
+        return out, np.array(times)
+
+    truth, exact_times = ranked(exact)
+    found, approx_times = ranked(approx)
+    recall = np.mean([len(t & f) / max(1, len(t)) for t, f in zip(truth, found)])
+    return recall, exact_times, approx_times
+
+
+if __name__ == "__main__":
+    from utils.ai_recommender import RecipeRecommender
+    from utils.recipe_store import RecipeStore
+    from utils.synthetic import synthetic_store
+
+    parser = argparse.ArgumentParser(description="Recall@k and latency of IVF search against exact search")
+    parser.add_argument("--synthetic", type=int, default=0, help="benchmark N synthetic recipes instead of the CSV")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--dims", type=int, default=128)
+    parser.add_argument("--lists", type=int, default=0, help="inverted lists (default: sqrt(N))")
+    parser.add_argument("--probe", default="1,4,16", help="comma-separated probe counts to try")
+    parser.add_argument("--no-rerank", action="store_true")
+    args = parser.parse_args()
+
+    store = synthetic_store(args.synthetic) if args.synthetic else RecipeStore.load()
+    recommender = RecipeRecommender(store=store)
+    matrix = recommender.tfidf_matrix
+    rng = np.random.default_rng(1)
+    queries = matrix[rng.choice(matrix.shape[0], size=min(args.queries, matrix.shape[0]), replace=False)]
+
+    started = time.perf_counter()
+    ivf = IVFSearch(matrix, dims=args.dims, lists=args.lists or None, rerank=not args.no_rerank)
+    print(f"{matrix.shape[0]} recipes, {ivf.lists} lists, {args.dims} dims; "
+          f"built in {time.perf_counter() - started:.1f}s")
+    for probe in [int(p) for p in args.probe.split(",")]:
+        ivf.probe = probe
+        recall, exact_t, ivf_t = recall_at_k(ExactSearch(matrix), ivf, queries, args.k)
+        print(f"probe={probe:<4} recall@{args.k}={recall:.3f}  "
+              f"exact p50={np.median(exact_t) * 1e3:.2f}ms  ivf p50={np.median(ivf_t) * 1e3:.2f}ms")
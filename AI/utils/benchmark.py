@@ -0,0 +1,463 @@
+"""Microbenchmarks and an in-process load test for the CookMate API.
+
+Run from the AI/ directory::
+
+    python -m utils.benchmark --rows 1000,10000 --out bench.json
+    python -m utils.benchmark --rows 10000 --compare bench.json
+
+For every corpus size a synthetic updatedRecipe.csv (same schema, BOM'd
+header) is written to ``--workdir`` together with its columnar corpus and
+prebuilt search index, and the API is imported against it. Then
+
+* the hot functions are timed directly: dietary filters, /search scoring,
+  the recommender and recipe detail lookups;
+* the FastAPI app is driven in-process through ``httpx.ASGITransport`` by
+  ``--clients`` concurrent clients on a mixed workload, reporting
+  p50/p95/p99 latency, throughput and status codes per endpoint;
+* with ``--workers 1,8``, that many worker processes (each importing the API
+  and loading its snapshot, as ``uvicorn --workers`` does) are started side
+  by side and their RSS, PSS and private memory read from /proc, showing
+  how much each extra worker really costs.
+
+Each size runs in its own interpreter so its peak RSS is its own. The time
+to ``import api`` in a fresh interpreter is checked against
+``IMPORT_BUDGET_SECONDS`` on every run (``--import-only`` does just that).
+Results, with the git commit they were measured on, are written as JSON;
+pass an earlier file to ``--compare`` to print new/old ratios.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_DIR = os.path.dirname(UTILS_DIR)
+FORMAT_VERSION = 1
+
+# Importing the API must stay cheap: workers and tests import it before any corpus work
+IMPORT_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = ("pandas", "scipy", "sklearn", "nltk", "sqlalchemy")
+
+# Relative request mix of the load test
+LOAD_MIX = {"search": 4, "by_ingredients": 2, "by_recipe": 2, "recipe": 3, "batch": 1, "health": 1}
+DIETARY_CHOICES = [None, ["vegetarian"], ["gluten-free"], ["vegan", "dairy-free"]]
+ALLERGY_CHOICES = [None, None, ["nuts"], ["shellfish", "fish"]]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=AI_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=AI_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def summarize(seconds) -> dict:
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    if not len(ms):
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"n": len(ms), "meanMs": round(ms.mean(), 4), "p50Ms": round(p50, 4),
+            "p95Ms": round(p95, 4), "p99Ms": round(p99, 4), "maxMs": round(ms.max(), 4)}
+
+
+def measure_import(runs: int = 3, budget: float = IMPORT_BUDGET_SECONDS) -> dict:
+    """Best-of-``runs`` wall time of ``import api`` in a fresh interpreter."""
+    code = ("import sys, time; sys.path[:0] = ['api', '.']; started = time.perf_counter(); import api; "
+            "print(time.perf_counter() - started); "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    env = {k: v for k, v in os.environ.items() if k != "COOKMATE_PRELOAD"}
+    seconds, heavy = [], ""
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=AI_DIR, env=env,
+                             capture_output=True, text=True, check=True).stdout.split("\n")
+        seconds.append(float(out[0]))
+        heavy = out[1]
+    best = min(seconds)
+    result = {"seconds": round(best, 3), "budgetSeconds": budget, "withinBudget": best <= budget,
+              "heavyModules": [m for m in heavy.split(",") if m]}
+    print(f"import api: {best:.3f}s (budget {budget:g}s{'' if result['withinBudget'] else ', OVER BUDGET'})"
+          + (f", imports {', '.join(result['heavyModules'])}" if result["heavyModules"] else ""))
+    return result
+
+
+# ---- Worker memory ----
+# One API worker: load the snapshot, touch the hot paths, then idle until stdin closes
+WORKER_SCRIPT = """
+import sys
+sys.path[:0] = ["api", "."]
+import api
+api.snapshots.reload(wait=True)
+snap = api.snapshots.current
+api.run_search(snap, "salt pepper", None, None, None, {}, 20, False)
+snap.recommender.recommend_by_ingredients("salt pepper")
+print("ready" if api.snapshots.ready else "failed", flush=True)
+sys.stdin.read()
+"""
+
+
+def process_memory(pid: int) -> dict:
+    """RSS, PSS (shared pages split between their users) and private memory of ``pid`` in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                fields[key] = int(rest.split()[0]) / 1024
+    return {"rssMb": round(fields["Rss"], 1), "pssMb": round(fields["Pss"], 1),
+            "privateMb": round(fields["Private_Clean"] + fields["Private_Dirty"], 1)}
+
+
+def worker_memory(workers: int) -> dict:
+    """Memory of ``workers`` API processes serving the same corpus at once (Linux only)."""
+    procs = [subprocess.Popen([sys.executable, "-c", WORKER_SCRIPT], cwd=AI_DIR, stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True) for _ in range(workers)]
+    try:
+        for proc in procs:
+            line = "start"
+            while line and line.strip() not in ("ready", "failed"):
+                line = proc.stdout.readline()  # skip the API's own log lines
+            if line.strip() != "ready":
+                raise RuntimeError("a worker failed to load its snapshot")
+        per_worker = [process_memory(proc.pid) for proc in procs]
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+    totals = {key: round(sum(m[key] for m in per_worker), 1) for key in per_worker[0]}
+    print(f"  {workers} workers: RSS {totals['rssMb']} MB, PSS {totals['pssMb']} MB, "
+          f"private {totals['privateMb']} MB")
+    return {"workers": workers, "total": totals, "perWorker": per_worker}
+
+
+# ---- Corpus ----
+def prepare_workdir(rows: int, workdir: str, seed: int = 0) -> dict:
+    """Synthetic CSV, columnar corpus, store arrays and both indexes for ``rows`` recipes (reused if present)."""
+    from utils.corpus import build_corpus, is_fresh
+    from utils.recipe_store import RecipeStore, build_arrays, load_arrays
+    from utils.search_index import INGREDIENT_INDEX, SearchIndex
+    from utils.synthetic import synthetic_recipes
+
+    csv_path = os.path.join(workdir, f"recipes-{rows}-{seed}.csv")
+    index_dir = os.path.join(workdir, f"index-{rows}-{seed}")
+    timings = {}
+    started = time.perf_counter()
+    if not os.path.exists(csv_path):
+        os.makedirs(workdir, exist_ok=True)
+        synthetic_recipes(rows, seed).to_csv(csv_path + ".tmp", index=False, encoding="utf-8-sig")
+        os.replace(csv_path + ".tmp", csv_path)
+        timings["generateSeconds"] = round(time.perf_counter() - started, 3)
+    if not is_fresh(csv_path):
+        started = time.perf_counter()
+        build_corpus(csv_path)
+        timings["corpusSeconds"] = round(time.perf_counter() - started, 3)
+    if load_arrays(csv_path) is None:  # missing, stale or an older layout
+        started = time.perf_counter()
+        build_arrays(csv_path)
+        timings["arraysSeconds"] = round(time.perf_counter() - started, 3)
+    store = RecipeStore.load(csv_path)
+    ingredient_dir = os.path.join(index_dir, INGREDIENT_INDEX)
+    current = os.path.exists(os.path.join(ingredient_dir, "postings_indptr.npy")) and all(
+        SearchIndex.load(path).matches(store) for path in (index_dir, ingredient_dir))
+    if not current:
+        started = time.perf_counter()
+        SearchIndex.build(store).save(index_dir)
+        SearchIndex.build(store, text="ingredients").save(ingredient_dir)
+        timings["indexSeconds"] = round(time.perf_counter() - started, 3)
+    return {"csv": csv_path, "index": index_dir, **timings}
+
+
+def make_workload(store, count: int, seed: int = 0):
+    """``count`` random queries drawn from the corpus itself, so most of them hit."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(store), size=count)
+    queries = []
+    for pos in picks.tolist():
+        words = store.ingredients[pos].split()
+        take = rng.choice(len(words), size=min(len(words), int(rng.integers(1, 4))), replace=False)
+        queries.append({
+            "ingredients": " ".join(words[i] for i in sorted(take)) or "salt",
+            "recipe": store.names[pos],
+            "id": int(store.ids[pos]),
+            "dietary": DIETARY_CHOICES[rng.integers(len(DIETARY_CHOICES))],
+            "allergies": ALLERGY_CHOICES[rng.integers(len(ALLERGY_CHOICES))],
+        })
+    return queries
+
+
+# ---- Microbenchmarks ----
+def time_calls(fn, items, min_seconds: float = 1.0):
+    """Per-call latencies of ``fn(item)``, cycling ``items`` for at least ``min_seconds``."""
+    fn(items[0])  # warm caches and lazy state
+    latencies = []
+    deadline = time.perf_counter() + min_seconds
+    while time.perf_counter() < deadline or len(latencies) < len(items):
+        item = items[len(latencies) % len(items)]
+        started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def microbenchmarks(api, workload, min_seconds: float, batch_size: int = 32) -> dict:
+    snap = api.snapshots.current
+    store, recommender = snap.store, snap.recommender
+    ranges = {"calories": (None, 600.0), "cook_time": (None, 60)}
+    batches = [
+        [api.BatchQuery(ingredients=q["ingredients"]) if i % 2 else api.BatchQuery(recipe=q["recipe"])
+         for i, q in enumerate(workload[start:start + batch_size])]
+        for start in range(0, len(workload) - batch_size + 1, batch_size)
+    ] or [[api.BatchQuery(ingredients=q["ingredients"]) for q in workload]]
+    cases = {
+        "apply_dietary_filters": (
+            lambda q: api.apply_dietary_filters(store, q["dietary"], q["allergies"]), workload),
+        "search": (
+            lambda q: api.run_search(snap, q["ingredients"], q["dietary"], q["allergies"], None, {}, 100, True),
+            workload),
+        "search_ranges": (
+            lambda q: api.run_search(snap, q["ingredients"], None, None, ["italian"], ranges, 100, True),
+            workload),
+        "recommend_by_ingredients": (
+            lambda q: recommender.recommend_by_ingredients(q["ingredients"], top_n=5), workload),
+        "recommend_by_recipe": (
+            lambda q: recommender.recommend_by_recipe(q["recipe"], top_n=5), workload),
+        f"recommend_batch_{batch_size}": (lambda b: api.run_batch(snap, b, 5), batches),
+        "get_recipe": (lambda q: store.detail(q["id"]), workload),
+    }
+    results = {}
+    for name, (fn, items) in cases.items():
+        latencies = time_calls(fn, items, min_seconds)
+        results[name] = {**summarize(latencies), "opsPerSecond": round(len(latencies) / sum(latencies), 1)}
+        print(f"  {name:<28} p50 {results[name]['p50Ms']:>9.3f} ms  p99 {results[name]['p99Ms']:>9.3f} ms")
+    return results
+
+
+# ---- Load test ----
+def load_requests(workload, count: int, seed: int = 0):
+    """(endpoint, method, url, params, json) tuples following ``LOAD_MIX``."""
+    rng = np.random.default_rng(seed)
+    names = list(LOAD_MIX)
+    weights = np.array([LOAD_MIX[n] for n in names], dtype=np.float64)
+    kinds = rng.choice(len(names), size=count, p=weights / weights.sum())
+    requests = []
+    for i, kind in enumerate(kinds.tolist()):
+        q = workload[i % len(workload)]
+        filters = {"dietary": q["dietary"] or [], "allergies": q["allergies"] or []}
+        endpoint = names[kind]
+        if endpoint == "search":
+            requests.append((endpoint, "GET", "/search",
+                             {"user_id": 1, "ingredients": q["ingredients"], "top_n": 20, **filters}, None))
+        elif endpoint == "by_ingredients":
+            requests.append((endpoint, "GET", "/recommend/by_ingredients",
+                             {"ingredients": q["ingredients"], **filters}, None))
+        elif endpoint == "by_recipe":
+            requests.append((endpoint, "GET", "/recommend/by_recipe", {"recipe": q["recipe"], **filters}, None))
+        elif endpoint == "recipe":
+            requests.append((endpoint, "GET", f"/recipe/{q['id']}", None, None))
+        elif endpoint == "batch":
+            batch = workload[i % len(workload):][:16] or workload[:16]
+            requests.append((endpoint, "POST", "/recommend/batch", None,
+                             {"queries": [{"ingredients": b["ingredients"]} for b in batch], "top_n": 5}))
+        else:
+            requests.append((endpoint, "GET", "/health", None, None))
+    return requests
+
+
+async def _drive(app, requests, clients: int):
+    import httpx
+
+    results = []
+    pending = iter(requests)
+
+    async def client_loop(client):
+        # Clients share one iterator, so the mix is spread across them
+        for endpoint, method, url, params, body in pending:
+            started = time.perf_counter()
+            response = await client.request(method, url, params=params, json=body)
+            results.append((endpoint, response.status_code, time.perf_counter() - started))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def load_test(api, workload, count: int, clients: int, seed: int = 0) -> dict:
+    requests = load_requests(workload, count, seed)
+    asyncio.run(_drive(api.app, requests[:max(1, count // 20)], clients))  # warm-up
+    results, elapsed = asyncio.run(_drive(api.app, requests, clients))
+
+    report = {
+        "clients": clients,
+        "requests": len(results),
+        "seconds": round(elapsed, 3),
+        "throughputRps": round(len(results) / elapsed, 1),
+        "latency": summarize([r[2] for r in results]),
+        "endpoints": {},
+    }
+    for endpoint in LOAD_MIX:
+        rows = [r for r in results if r[0] == endpoint]
+        statuses = {}
+        for _, status, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        report["endpoints"][endpoint] = {**summarize([r[2] for r in rows]), "status": statuses}
+    latency = report["latency"]
+    print(f"  load: {report['throughputRps']} req/s with {clients} clients, "
+          f"p50 {latency['p50Ms']:.2f} / p95 {latency['p95Ms']:.2f} / p99 {latency['p99Ms']:.2f} ms")
+    return report
+
+
+# ---- Runs ----
+def run_size(rows: int, args) -> dict:
+    """Benchmark one corpus size in this process."""
+    print(f"[{rows} recipes]")
+    paths = prepare_workdir(rows, args.workdir, args.seed)
+    # The API reads its configuration at import time
+    os.environ["COOKMATE_CSV"] = paths["csv"]
+    os.environ["COOKMATE_INDEX_DIR"] = paths["index"]
+    os.environ["COOKMATE_CACHE_SIZE"] = str(args.cache)
+    os.environ.setdefault("COOKMATE_SCORING_QUEUE", str(max(64, args.clients * 2)))
+    os.environ.pop("COOKMATE_PRELOAD", None)
+    # Before this process maps the corpus, so workers only share pages with each other
+    memory = [worker_memory(n) for n in args.workers] if args.workers else None
+
+    sys.path.insert(0, os.path.join(AI_DIR, "api"))
+    started = time.perf_counter()
+    import api
+    import_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    if not api.snapshots.ready:
+        api.snapshots.reload(wait=True)  # what the app's startup does, but waited for
+    snapshot_seconds = time.perf_counter() - started
+
+    workload = make_workload(api.snapshots.current.store, args.queries, args.seed)
+    result = {
+        "rows": rows,
+        "setup": {k: v for k, v in paths.items() if k.endswith("Seconds")},
+        "micro": {},
+        "load": None,
+        "workerMemory": memory,
+    }
+    result["setup"]["apiImportSeconds"] = round(import_seconds, 3)
+    result["setup"]["snapshotSeconds"] = round(snapshot_seconds, 3)
+    if not args.skip_micro:
+        result["micro"] = microbenchmarks(api, workload, args.min_seconds)
+    if not args.skip_load:
+        result["load"] = load_test(api, workload, args.requests, args.clients, args.seed)
+    api.scoring.shutdown()
+    result["peakRssMb"] = peak_rss_mb()
+    print(f"  peak RSS {result['peakRssMb']} MB")
+    return result
+
+
+def run_isolated(rows: int, args) -> dict:
+    """``run_size`` in a fresh interpreter, so memory and imports don't leak between sizes."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out = f.name
+    try:
+        command = [sys.executable, "-m", "utils.benchmark", "--rows", str(rows), "--out", out,
+                   "--workdir", args.workdir, "--seed", str(args.seed), "--queries", str(args.queries),
+                   "--requests", str(args.requests), "--clients", str(args.clients),
+                   "--min-seconds", str(args.min_seconds), "--cache", str(args.cache),
+                   "--workers", ",".join(map(str, args.workers))]
+        command += [flag for flag, on in (("--skip-micro", args.skip_micro), ("--skip-load", args.skip_load)) if on]
+        subprocess.run(command, cwd=AI_DIR, check=True)
+        with open(out, encoding="utf-8") as f:
+            return json.load(f)["runs"][0]
+    finally:
+        os.remove(out)
+
+
+def compare(old: dict, new: dict):
+    """Print new/old ratios of p50 latency and throughput for the sizes both runs share."""
+    print(f"Compared with {old.get('commit')} ({old.get('startedAt')}); ratio < 1 is faster")
+    previous = {run["rows"]: run for run in old.get("runs", [])}
+    for run in new["runs"]:
+        before = previous.get(run["rows"])
+        if before is None:
+            continue
+        print(f"[{run['rows']} recipes]")
+        for name, stats in run["micro"].items():
+            was = before.get("micro", {}).get(name)
+            if was and was.get("p50Ms"):
+                print(f"  {name:<28} p50 x{stats['p50Ms'] / was['p50Ms']:.2f}")
+        if run["load"] and before.get("load"):
+            print(f"  {'load throughput':<28} x{run['load']['throughputRps'] / before['load']['throughputRps']:.2f}")
+            print(f"  {'load p99':<28} x{run['load']['latency']['p99Ms'] / before['load']['latency']['p99Ms']:.2f}")
+        for after in run.get("workerMemory") or []:
+            was = {m["workers"]: m for m in before.get("workerMemory") or []}.get(after["workers"])
+            if was:
+                print(f"  {str(after['workers']) + ' workers PSS':<28} x{after['total']['pssMb'] / was['total']['pssMb']:.2f}")
+        if run.get("peakRssMb") and before.get("peakRssMb"):
+            print(f"  {'peak RSS':<28} x{run['peakRssMb'] / before['peakRssMb']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark and load-test the CookMate API on synthetic corpora")
+    parser.add_argument("--rows", default="1000,10000", help="comma-separated corpus sizes, e.g. 1000,10000,100000,1000000")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "cookmate-bench"),
+                        help="where synthetic corpora are written and reused")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200, help="distinct queries drawn from the corpus")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="minimum time per microbenchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="load-test requests")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent load-test clients")
+    parser.add_argument("--cache", type=int, default=0, help="response cache entries (0: measure uncached)")
+    parser.add_argument("--workers", default="", type=lambda v: [int(x) for x in v.split(",") if x.strip()],
+                        help="measure memory of this many API worker processes, e.g. 1,8 (Linux)")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_SECONDS,
+                        help="seconds allowed for importing the API")
+    parser.add_argument("--import-only", action="store_true",
+                        help="only check the import time; exits 1 when over budget")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    if args.import_only:
+        sys.exit(0 if measure_import(budget=args.import_budget)["withinBudget"] else 1)
+
+    sizes = [int(x) for x in args.rows.split(",") if x.strip()]
+    commit, dirty = git_commit()
+    results = {
+        "version": FORMAT_VERSION,
+        "commit": commit,
+        "dirty": dirty,
+        "startedAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "import": measure_import(budget=args.import_budget),
+        "runs": [run_size(sizes[0], args)] if len(sizes) == 1 else [run_isolated(n, args) for n in sizes],
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
@@ -1,10 +1,39 @@
-import os, re, string
+"""Streaming vocabulary builder for /suggest, query correction and TF-IDF.
+
+Run from anywhere::
+
+    python utils/build_nlp_words.py [--incremental] [--workers 4]
+
+Reads updatedRecipe.csv in bounded chunks and writes next to it:
+
+- ``nlpTerms.tsv``: term, term frequency and document frequency (recipes using it)
+- ``nlpWords.txt``: the sorted terms, one per line
+- ``nlpTerms.ids.npy``: RecipeIds already counted
+
+``--incremental`` only tokenizes recipes whose id is not in ``nlpTerms.ids.npy``
+and adds their counts, so appending recipes does not mean a full rebuild.
+Counts cannot be subtracted: rebuild without the flag after edits or deletes.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
-BASE = os.path.dirname(os.path.dirname(__file__))          # .../ai
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # .../ai
 CSV_PATH = os.path.join(BASE, "utils", "updatedRecipe.csv")
 OUT_PATH = os.path.join(BASE, "utils", "nlpWords.txt")
 
+sys.path.insert(0, BASE)  # make `utils` importable when run as a script
+from utils.corpus import read_recipe_csv_chunks
+from utils.fuzzy import TOKEN_RE, TERMS_PATH
+
+IDS_PATH = os.path.splitext(TERMS_PATH)[0] + ".ids.npy"
+TEXT_COLUMNS = ["Name", "RecipeIngredientParts", "RecipeInstructions", "Keywords"]
+
 STOP = {
     "a","an","the","and","or","of","for","to","with","on","in","at","by","from",
     "into","over","under","about","as","is","are","was","were","be","been","being",
@@ -17,32 +46,97 @@ STOP = {
     "minced","sliced","diced","whole","skinless","boneless","optional","plus","divided","taste"
 }
 
-if not os.path.exists(CSV_PATH):
-    raise FileNotFoundError(f"CSV not found: {CSV_PATH}")
 
-df = pd.read_csv(CSV_PATH, encoding="utf-8")
+def count_terms(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Term and document frequencies for one chunk of recipes, indexed by term."""
+    columns = [c for c in TEXT_COLUMNS if c in chunk.columns]
+    text = chunk[columns[0]].fillna("").astype(str)
+    for col in columns[1:]:
+        text = text + " " + chunk[col].fillna("").astype(str)
+
+    tokens = text.str.lower().str.findall(TOKEN_RE).explode().dropna()
+    tokens = tokens[~tokens.isin(STOP)].rename("term")
+    tf = tokens.value_counts()
+    # (row, term) pairs, deduplicated, count each recipe once per term
+    df = tokens.reset_index().drop_duplicates()["term"].value_counts()
+    return pd.DataFrame({"tf": tf, "df": df}).fillna(0).astype("int64")
+
+
+def read_terms(path: str = TERMS_PATH) -> pd.DataFrame:
+    return pd.read_csv(path, sep="\t", index_col="term", keep_default_na=False,
+                       dtype={"tf": "int64", "df": "int64"})
+
+
+def iter_chunks(csv_path, chunksize, seen, new_ids):
+    """CSV chunks restricted to recipes not in ``seen``; their ids go to ``new_ids``."""
+    for chunk in read_recipe_csv_chunks(csv_path, chunksize, columns=["RecipeId", *TEXT_COLUMNS]):
+        if not any(c in chunk.columns for c in TEXT_COLUMNS):
+            raise RuntimeError(f"updatedRecipe.csv needs at least one of: {', '.join(TEXT_COLUMNS)}")
+        ids = pd.to_numeric(chunk["RecipeId"], errors="coerce")
+        keep = (ids.notna() & ~ids.isin(seen)).to_numpy()
+        if keep.any():
+            new_ids.append(ids[keep].to_numpy(dtype=np.int64))
+            yield chunk[keep]
+
+
+def count_chunks(chunks, workers=1):
+    """Yield per-chunk counts, keeping at most two chunks per worker in flight."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield count_terms(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(count_terms, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def build_terms(csv_path=CSV_PATH, incremental=False, workers=1, chunksize=20000):
+    """Count the corpus (or just its new recipes) and return (terms, ids, new rows)."""
+    terms = pd.DataFrame({"tf": [], "df": []}, dtype="int64", index=pd.Index([], name="term"))
+    seen = np.zeros(0, dtype=np.int64)
+    if incremental and os.path.exists(TERMS_PATH) and os.path.exists(IDS_PATH):
+        terms, seen = read_terms(TERMS_PATH), np.load(IDS_PATH)
+
+    new_ids = []
+    for counts in count_chunks(iter_chunks(csv_path, chunksize, seen, new_ids), workers):
+        terms = terms.add(counts, fill_value=0).astype("int64")
+    added = sum(len(ids) for ids in new_ids)
+    ids = np.concatenate([seen, *new_ids]) if new_ids else seen
+    return terms.sort_index(), ids, added
 
-text_cols = [c for c in df.columns if c.lower() in {"name","ingredients","instructions","keywords"}]
-if not text_cols:
-    raise RuntimeError("updatedRecipe.csv needs at least one of: name, ingredients, instructions, keywords")
 
-punct = str.maketrans("", "", string.punctuation)
-terms = set()
+def write_terms(terms: pd.DataFrame, ids, min_df: int = 1):
+    # Write beside and rename, so the API's file watcher never sees a partial file
+    terms.to_csv(TERMS_PATH + ".tmp", sep="\t", index_label="term")
+    os.replace(TERMS_PATH + ".tmp", TERMS_PATH)
+    with open(IDS_PATH + ".tmp", "wb") as f:
+        np.save(f, np.asarray(ids, dtype=np.int64))
+    os.replace(IDS_PATH + ".tmp", IDS_PATH)
+    with open(OUT_PATH + ".tmp", "w", encoding="utf-8") as f:
+        f.write("\n".join(terms.index[terms["df"] >= min_df]))
+    os.replace(OUT_PATH + ".tmp", OUT_PATH)
 
-def add_text(s):
-    if not isinstance(s, str): return
-    s = s.lower()
-    s = re.sub(r"\d+", " ", s)
-    s = s.translate(punct)
-    for w in s.split():
-        if len(w) > 1 and w not in STOP:
-            terms.add(w)
 
-for col in text_cols:
-    for v in df[col].dropna().tolist():
-        add_text(v)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build nlpTerms.tsv and nlpWords.txt from the recipe CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only count recipes added since the last run")
+    parser.add_argument("--workers", type=int, default=1, help="tokenizer processes")
+    parser.add_argument("--chunksize", type=int, default=20000, help="CSV rows per chunk")
+    parser.add_argument("--min-df", type=int, default=1,
+                        help="leave terms used by fewer recipes out of nlpWords.txt")
+    args = parser.parse_args()
 
-with open(OUT_PATH, "w", encoding="utf-8") as f:
-    f.write("\n".join(sorted(terms)))
+    if not os.path.exists(CSV_PATH):
+        raise FileNotFoundError(f"CSV not found: {CSV_PATH}")
 
-print(f"Built {OUT_PATH} with {len(terms)} English terms.")
+    started = time.perf_counter()
+    terms, ids, added = build_terms(CSV_PATH, args.incremental, args.workers, args.chunksize)
+    write_terms(terms, ids, args.min_df)
+    print(f"Counted {added} recipes ({len(ids)} total) in {time.perf_counter() - started:.2f}s; "
+          f"{OUT_PATH} has {int((terms['df'] >= args.min_df).sum())} English terms.")
@@ -0,0 +1,170 @@
+"""Response cache for the search and recommendation endpoints.
+
+Entries are rendered JSON bodies keyed on the normalized query (sorted,
+lowercased tokens plus every filter that changes the answer) and on the
+snapshot version, so a corpus reload never serves stale results.
+
+``MemoryCache`` is a per-process LRU with a TTL. ``RedisCache`` keeps the
+same entries in Redis so several uvicorn workers share hits; it needs the
+optional ``redis`` package and is picked with ``COOKMATE_CACHE_URL``.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercased query tokens in sorted order (TF-IDF ignores word order)."""
+    return " ".join(sorted(_WORD.findall((text or "").lower())))
+
+
+def cache_key(endpoint: str, query: str, **params) -> str:
+    parts = [endpoint, normalize_query(query)]
+    for name in sorted(params):
+        value = params[name]
+        if value is None or value == []:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ",".join(sorted(str(v).strip().lower() for v in value))
+        parts.append(f"{name}={value}")
+    return "|".join(parts)
+
+
+class MemoryCache:
+    """Size-bounded LRU of ``key -> bytes`` whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> int:
+        """Drop every entry; returns how many were removed."""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+        return removed
+
+
+class RedisCache:
+    """Same interface backed by Redis; eviction is left to Redis' TTL and maxmemory policy."""
+
+    def __init__(self, url: str, ttl: float = 300.0, prefix: str = "cookmate:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("COOKMATE_CACHE_URL needs the 'redis' package (pip install redis)") from e
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.evictions = 0
+
+    def __len__(self):
+        return 0  # not tracked per process
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=max(1, int(self.ttl)))
+
+    def clear(self, batch: int = 500) -> int:
+        """Delete every key under ``prefix`` (all workers); returns how many were removed."""
+        removed, keys = 0, []
+        for key in self.client.scan_iter(match=self.prefix + "*", count=batch):
+            keys.append(key)
+            if len(keys) >= batch:
+                removed += self.client.delete(*keys)
+                keys = []
+        if keys:
+            removed += self.client.delete(*keys)
+        return removed
+
+
+class ResponseCache:
+    """Backend plus hit/miss counters, scoped to the snapshot that produced an entry.
+
+    A reload changes the snapshot version in every key, so older entries are
+    never read again; they age out through the LRU or TTL instead of being
+    cleared (other workers may still be serving that version).
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _scoped(self, snapshot, key):
+        return f"{snapshot.version}|{key}"
+
+    def get(self, snapshot, key):
+        try:
+            value = self.backend.get(self._scoped(snapshot, key))
+        except Exception:
+            self.errors += 1  # a cache outage must never fail the request
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, snapshot, key, value):
+        try:
+            self.backend.set(self._scoped(snapshot, key), value)
+        except Exception:
+            self.errors += 1
+
+    def clear(self) -> int:
+        """Empty the backend (for Redis, every worker's entries); returns how many were removed."""
+        return self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "errors": self.errors,
+        }
+
+
+def make_cache(max_entries: int, ttl: float, url: str = None):
+    """ResponseCache for the configured backend, or None when caching is off."""
+    if url:
+        return ResponseCache(RedisCache(url, ttl))
+    if max_entries <= 0:
+        return None
+    return ResponseCache(MemoryCache(max_entries, ttl))
@@ -0,0 +1,229 @@
+"""Typed, columnar copy of updatedRecipe.csv and the one reader everyone uses.
+
+Convert the CSV from the AI/ directory with::
+
+    python -m utils.corpus
+
+This writes ``updatedRecipe.corpus/`` next to the CSV: one ``.npy`` per
+numeric column, a UTF-8 blob plus offsets per text column, and ``meta.json``
+with the schema and the CSV size/mtime it was built from. ``read_corpus``
+prefers that directory while it is fresh and falls back to parsing the CSV,
+so every consumer sees the same columns either way. It also saves the
+store's row-aligned arrays (ids, ratings, filter bitmaps, range columns
+and the cleaned response text) under ``updatedRecipe.corpus/arrays/``; API
+workers memory-map them read-only, so every worker shares one copy of
+those pages.
+"""
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from utils.cuisine import CUISINE_NAMES, tag_cuisines
+from utils.formatting import duration_minutes, split_lists
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(UTILS_DIR, "updatedRecipe.csv")
+FORMAT_VERSION = 1
+
+NUMERIC_COLUMNS = [
+    "AggregatedRating", "ReviewCount", "Calories", "FatContent", "SaturatedFatContent",
+    "CholesterolContent", "SodiumContent", "CarbohydrateContent", "FiberContent",
+    "SugarContent", "ProteinContent", "RecipeServings",
+]
+# Derived at conversion time: ISO8601 durations as minutes, split ingredients
+DURATION_COLUMNS = {"TotalTime": "TotalMinutes", "CookTime": "CookMinutes", "PrepTime": "PrepMinutes"}
+LIST_COLUMNS = {"RecipeIngredientParts": "IngredientList"}
+
+
+def corpus_dir_for(csv_path: str = CSV_PATH) -> str:
+    return os.path.splitext(csv_path)[0] + ".corpus"
+
+
+def read_recipe_csv(path: str = CSV_PATH) -> pd.DataFrame:
+    """Read the raw recipe CSV and repair the BOM'd RecipeId header."""
+    if not os.path.exists(path): return pd.DataFrame()
+    csv = pd.read_csv(path, quotechar='"', encoding="utf-8")
+    if "\ufeffRecipeId" in csv.columns:
+        csv = csv.rename(columns={"\ufeffRecipeId": "RecipeId"})
+    return csv
+
+
+def read_recipe_csv_chunks(path: str = CSV_PATH, chunksize: int = 20000, columns=None):
+    """Stream the raw CSV in bounded-size DataFrame chunks (BOM header repaired)."""
+    if not os.path.exists(path):
+        return
+    # utf-8-sig drops the BOM, so RecipeId can be selected by name
+    usecols = (lambda c: c in columns) if columns is not None else None
+    with pd.read_csv(path, quotechar='"', encoding="utf-8-sig", usecols=usecols, chunksize=chunksize) as reader:
+        yield from reader
+
+
+def prepare_corpus(csv: pd.DataFrame) -> pd.DataFrame:
+    """Coerce the raw CSV columns to the shared schema and add derived columns."""
+    df = csv.copy()
+    if "RecipeId" in df.columns:
+        df["RecipeId"] = pd.to_numeric(df["RecipeId"], errors="coerce")
+        df = df.dropna(subset=["RecipeId"]).reset_index(drop=True)
+        df["RecipeId"] = df["RecipeId"].astype("int64")
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col, derived in DURATION_COLUMNS.items():
+        if col in df.columns:
+            df[derived] = duration_minutes(df[col])
+    for col, derived in LIST_COLUMNS.items():
+        if col in df.columns:
+            df[derived] = split_lists(df[col].fillna("").astype(str), r"[;,]")
+    df["CuisineId"] = tag_cuisines(df)  # index into cuisine.CUISINE_NAMES, -1 untagged
+    return df
+
+
+# ---- Columnar format ----
+def _kind(series: pd.Series) -> str:
+    if series.name in LIST_COLUMNS.values():
+        return "list"
+    if pd.api.types.is_integer_dtype(series):
+        return "int"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    return "str"
+
+
+def _encode_strings(values):
+    """UTF-8 blob, byte offsets and null mask for a sequence of str/None."""
+    encoded = [b"" if v is None else str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets, np.array([v is None for v in values], dtype=bool)
+
+
+def _decode_strings(blob, offsets, nulls=None):
+    raw = blob.tobytes()
+    values = [raw[a:b].decode("utf-8") for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    if nulls is not None and nulls.any():
+        for i in np.flatnonzero(nulls):
+            values[i] = None
+    return values
+
+
+def _source_stamp(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {"path": os.path.basename(csv_path), "size": st.st_size, "mtime": st.st_mtime}
+
+
+def source_stamp(csv_path: str = CSV_PATH):
+    """Size/mtime of the CSV the corpus comes from (the recorded one when only the artifact ships).
+
+    Derived artifacts (search index, neighbour table) save it and are rebuilt
+    when it no longer matches, since an edited row can keep its recipe id.
+    """
+    if os.path.exists(csv_path):
+        return _source_stamp(csv_path)
+    meta_path = os.path.join(corpus_dir_for(csv_path), "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f).get("source")
+
+
+def write_corpus(df: pd.DataFrame, out_dir: str, source: dict = None):
+    os.makedirs(out_dir, exist_ok=True)
+    columns = {}
+    for name in df.columns:
+        kind = columns[name] = _kind(df[name])
+        base = os.path.join(out_dir, name)
+        if kind in ("int", "float"):
+            np.save(base + ".npy", df[name].to_numpy())
+        elif kind == "list":
+            lists = df[name].tolist()
+            lengths = [len(x) for x in lists]
+            list_offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=list_offsets[1:])
+            blob, offsets, _ = _encode_strings([v for x in lists for v in x])
+            np.save(base + ".lists.npy", list_offsets)
+            np.save(base + ".blob.npy", blob)
+            np.save(base + ".offsets.npy", offsets)
+        else:
+            values = [None if pd.isna(v) else v for v in df[name].tolist()]
+            blob, offsets, nulls = _encode_strings(values)
+            np.save(base + ".blob.npy", blob)
+            np.save(base + ".offsets.npy", offsets)
+            np.save(base + ".nulls.npy", nulls)
+    meta = {"version": FORMAT_VERSION, "rows": len(df), "columns": columns, "source": source,
+            "cuisines": CUISINE_NAMES}
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def read_columnar(corpus_dir: str, mmap: bool = True, columns=None) -> pd.DataFrame:
+    """Load a corpus directory written by ``write_corpus`` (only ``columns`` when given)."""
+    mode = "r" if mmap else None
+    with open(os.path.join(corpus_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported corpus version: {meta.get('version')}")
+
+    data = {}
+    for name, kind in meta["columns"].items():
+        if columns is not None and name not in columns:
+            continue  # never decoded, so never resident
+        base = os.path.join(corpus_dir, name)
+        load = lambda suffix: np.load(base + suffix, mmap_mode=mode)
+        if kind in ("int", "float"):
+            data[name] = np.asarray(load(".npy"))
+        elif kind == "list":
+            flat = _decode_strings(load(".blob.npy"), load(".offsets.npy"))
+            bounds = load(".lists.npy").tolist()
+            data[name] = pd.Series([flat[a:b] for a, b in zip(bounds[:-1], bounds[1:])], dtype=object)
+        else:
+            data[name] = pd.Series(_decode_strings(load(".blob.npy"), load(".offsets.npy"), load(".nulls.npy")), dtype=object)
+    return pd.DataFrame(data)
+
+
+def is_fresh(csv_path: str = CSV_PATH, corpus_dir: str = None) -> bool:
+    """True when the corpus directory exists and was built from this exact CSV."""
+    corpus_dir = corpus_dir or corpus_dir_for(csv_path)
+    meta_path = os.path.join(corpus_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("cuisines") != CUISINE_NAMES:
+        return False  # tagged with another cuisine list; ids would be wrong
+    if not os.path.exists(csv_path):
+        return True  # shipped without the CSV: the artifact is all we have
+    source = meta.get("source") or {}
+    stamp = _source_stamp(csv_path)
+    return source.get("size") == stamp["size"] and source.get("mtime") == stamp["mtime"]
+
+
+def read_corpus(csv_path: str = CSV_PATH, corpus_dir: str = None, columns=None) -> pd.DataFrame:
+    """The recipe corpus in the shared schema, from the columnar copy when fresh.
+
+    ``columns`` limits what the columnar copy decodes; the CSV fallback reads everything.
+    """
+    corpus_dir = corpus_dir or corpus_dir_for(csv_path)
+    if is_fresh(csv_path, corpus_dir):
+        try:
+            return read_columnar(corpus_dir, columns=columns)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read {corpus_dir}: {e}; falling back to CSV.")
+    csv = read_recipe_csv(csv_path)
+    return prepare_corpus(csv) if not csv.empty else csv
+
+
+def build_corpus(csv_path: str = CSV_PATH, corpus_dir: str = None) -> str:
+    corpus_dir = corpus_dir or corpus_dir_for(csv_path)
+    df = prepare_corpus(read_recipe_csv(csv_path))
+    write_corpus(df, corpus_dir, source=_source_stamp(csv_path))
+    return corpus_dir
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    out = build_corpus(CSV_PATH)
+    from utils.recipe_store import build_arrays  # the store imports this module
+    build_arrays(CSV_PATH)
+    print(f"Built {out} in {time.perf_counter() - started:.2f}s")
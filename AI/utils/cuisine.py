@@ -0,0 +1,113 @@
+"""Cuisine tagging by keyword and ingredient signatures.
+
+Each cuisine has a signature: marker words (the cuisine's own name, which
+Food.com also uses in Keywords/RecipeCategory) and typical ingredients.
+Every recipe is scored against every signature in one sparse product and
+gets the best cuisine's id if it scores at least ``THRESHOLD``, else
+``UNTAGGED``. The corpus build stores the id per recipe, so filtering by
+cuisine is an integer comparison. Check the distribution with::
+
+    python -m utils.cuisine
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+
+UNTAGGED = -1
+MARKER_WEIGHT = 3.0
+INGREDIENT_WEIGHT = 1.0
+THRESHOLD = 2.0  # one marker, or two signature ingredients
+
+# cuisine -> (marker words, signature ingredients); ids follow this order
+CUISINES = {
+    "italian": (
+        ["italian", "italy", "tuscan", "sicilian"],
+        ["parmesan", "mozzarella", "ricotta", "basil", "oregano", "pasta", "spaghetti", "linguine",
+         "fettuccine", "penne", "lasagna", "risotto", "pesto", "prosciutto", "marinara", "gnocchi",
+         "pancetta", "mascarpone", "italian seasoning", "balsamic vinegar", "polenta"],
+    ),
+    "mexican": (
+        ["mexican", "mexico", "tex mex", "southwestern"],
+        ["tortilla", "tortillas", "salsa", "jalapeno", "cilantro", "cumin", "chili powder", "enchilada",
+         "taco", "tacos", "burrito", "quesadilla", "black beans", "pinto beans", "avocado", "chipotle",
+         "monterey jack", "queso", "tomatillo"],
+    ),
+    "indian": (
+        ["indian", "india"],
+        ["garam masala", "turmeric", "cardamom", "curry", "curry powder", "ghee", "paneer",
+         "mustard seeds", "fenugreek", "dal", "lentils", "naan", "masala", "tandoori", "coriander"],
+    ),
+    "asian": (
+        ["asian", "chinese", "japanese", "thai", "korean", "vietnamese"],
+        ["soy sauce", "ginger", "sesame oil", "rice vinegar", "hoisin", "fish sauce", "miso", "mirin",
+         "sake", "oyster sauce", "tofu", "bok choy", "wasabi", "lemongrass", "coconut milk",
+         "sesame seeds", "rice noodles", "sriracha"],
+    ),
+    "mediterranean": (
+        ["mediterranean", "greek", "moroccan", "lebanese", "turkish", "middle eastern"],
+        ["feta", "kalamata", "hummus", "tahini", "chickpeas", "garbanzo", "couscous", "pita",
+         "tzatziki", "sun dried tomatoes", "artichoke", "bulgur", "za atar", "sumac"],
+    ),
+    "american": (
+        ["american", "southern", "cajun", "barbecue", "bbq"],
+        ["ketchup", "bbq sauce", "barbecue sauce", "cheddar cheese", "bacon", "ranch dressing",
+         "corn syrup", "hot dog", "hamburger", "american cheese", "velveeta",
+         "cream of mushroom soup", "buttermilk", "maple syrup", "peanut butter", "marshmallows",
+         "graham cracker"],
+    ),
+}
+CUISINE_NAMES = list(CUISINES)
+CUISINE_IDS = {name: i for i, name in enumerate(CUISINE_NAMES)}
+
+# Raw corpus columns the tagger reads, when present
+TEXT_COLUMNS = ["Name", "RecipeIngredientParts", "Keywords", "RecipeCategory"]
+
+
+def _signature_matrix():
+    """Vocabulary and the (terms x cuisines) weight matrix."""
+    weights = {}
+    for c, (markers, ingredients) in enumerate(CUISINES.values()):
+        for term in ingredients:
+            weights[(term, c)] = max(weights.get((term, c), 0.0), INGREDIENT_WEIGHT)
+        for term in markers:
+            weights[(term, c)] = MARKER_WEIGHT
+    vocabulary = sorted({term for term, _ in weights})
+    index = {term: i for i, term in enumerate(vocabulary)}
+    rows, cols, vals = zip(*[(index[t], c, w) for (t, c), w in weights.items()])
+    matrix = sp.csr_matrix((vals, (rows, cols)), shape=(len(vocabulary), len(CUISINES)))
+    return vocabulary, matrix
+
+
+def tag_cuisines(raw: pd.DataFrame, threshold: float = THRESHOLD) -> np.ndarray:
+    """int8 cuisine id per row of the raw corpus (``UNTAGGED`` when nothing fits)."""
+    columns = [c for c in TEXT_COLUMNS if c in raw.columns]
+    if not len(raw) or not columns:
+        return np.full(len(raw), UNTAGGED, dtype=np.int8)
+    text = raw[columns[0]].fillna("").astype(str)
+    for col in columns[1:]:
+        text = text + " " + raw[col].fillna("").astype(str)
+
+    vocabulary, weights = _signature_matrix()
+    counter = CountVectorizer(vocabulary=vocabulary, ngram_range=(1, 3), binary=True,
+                              strip_accents="unicode")
+    scores = (counter.transform(text) @ weights).toarray()
+    best = scores.argmax(axis=1)
+    return np.where(scores[np.arange(len(best)), best] >= threshold, best, UNTAGGED).astype(np.int8)
+
+
+def cuisine_counts(ids: np.ndarray) -> dict:
+    """``{cuisine: recipes}`` for tagged cuisines, most common first."""
+    counts = np.bincount(ids[ids >= 0].astype(np.int64), minlength=len(CUISINE_NAMES))
+    order = np.argsort(-counts, kind="stable")
+    return {CUISINE_NAMES[i]: int(counts[i]) for i in order if counts[i] > 0}
+
+
+if __name__ == "__main__":
+    from utils.corpus import read_recipe_csv
+
+    raw = read_recipe_csv()
+    ids = tag_cuisines(raw)
+    print(f"{len(ids)} recipes, {int((ids == UNTAGGED).sum())} untagged")
+    for name, count in cuisine_counts(ids).items():
+        print(f"{name:<15} {count}")
@@ -0,0 +1,99 @@
+import numpy as np
+
+# ---- Dietary Filtering ----
+DIETARY_FILTERS = {
+    'vegetarian': {
+        'exclude': ['beef', 'chicken', 'pork', 'lamb', 'turkey', 'meat', 'bacon', 'ham', 'sausage'],
+        'include': []
+    },
+    'vegan': {
+        'exclude': ['beef', 'chicken', 'pork', 'lamb', 'turkey', 'meat', 'bacon', 'ham', 'sausage',
+                   'cheese', 'milk', 'butter', 'cream', 'yogurt', 'egg', 'honey'],
+        'include': []
+    },
+    'gluten-free': {
+        'exclude': ['wheat', 'flour', 'bread', 'pasta', 'noodles', 'barley', 'rye'],
+        'include': []
+    },
+    'dairy-free': {
+        'exclude': ['cheese', 'milk', 'butter', 'cream', 'yogurt'],
+        'include': []
+    },
+    'low-carb': {
+        'exclude': ['rice', 'pasta', 'bread', 'potato', 'noodles'],
+        'include': ['protein', 'vegetables']
+    },
+    'keto': {
+        'exclude': ['rice', 'pasta', 'bread', 'potato', 'sugar', 'fruit'],
+        'include': ['fat', 'protein', 'low carb']
+    },
+    'paleo': {
+        'exclude': ['grain', 'dairy', 'legume', 'processed'],
+        'include': ['meat', 'fish', 'vegetables', 'nuts']
+    }
+}
+
+ALLERGY_FILTERS = {
+    'nuts': ['almond', 'walnut', 'peanut', 'cashew', 'pecan', 'hazelnut'],
+    'shellfish': ['shrimp', 'crab', 'lobster', 'scallop', 'oyster'],
+    'fish': ['salmon', 'tuna', 'cod', 'trout', 'bass'],
+    'eggs': ['egg'],
+    'soy': ['soy', 'tofu', 'tempeh'],
+    'wheat': ['wheat', 'flour', 'bread'],
+    'dairy': ['milk', 'cheese', 'butter', 'cream', 'yogurt']
+}
+
+
+def _key(value: str) -> str:
+    return value.lower().replace('-', '').replace(' ', '')
+
+# "Gluten Free", "gluten-free" and "glutenfree" all resolve to the same filter
+_DIETARY_KEYS = {_key(k): k for k in DIETARY_FILTERS}
+
+# Every term any filter can exclude, in a fixed column order
+FILTER_TERMS = sorted(
+    {t for cfg in DIETARY_FILTERS.values() for t in cfg['exclude']}
+    | {t for terms in ALLERGY_FILTERS.values() for t in terms}
+)
+
+
+class TermBitmaps:
+    """Per-term "recipe mentions this" flags, computed once per corpus build.
+
+    ``bits[:, j]`` is True where FILTER_TERMS[j] occurs in the recipe name or
+    ingredients, so a dietary filter is just an OR over a few columns.
+    """
+
+    def __init__(self, bits: np.ndarray):
+        self.column = {term: j for j, term in enumerate(FILTER_TERMS)}
+        self.bits = bits  # from ``scan``; a read-only memmap when saved with the store's arrays
+
+    # Annotation is a string so importing the filters doesn't import pandas
+    @staticmethod
+    def scan(frame: "pandas.DataFrame") -> np.ndarray:
+        """(rows x FILTER_TERMS) mention flags, column-major."""
+        bits = np.zeros((len(frame), len(FILTER_TERMS)), dtype=bool, order="F")
+        if len(frame):
+            # One lowercase pass, then one substring scan per term for the whole corpus
+            text = (frame["name"].astype(str) + "\n" + frame["ingredients"]).str.lower()
+            for j, term in enumerate(FILTER_TERMS):
+                bits[:, j] = text.str.contains(term, regex=False).to_numpy(dtype=bool)
+        return bits
+
+    def excluded_terms(self, dietary_prefs=None, allergies=None):
+        terms = set()
+        for pref in dietary_prefs or []:
+            name = _DIETARY_KEYS.get(_key(pref))
+            if name:
+                terms.update(DIETARY_FILTERS[name]['exclude'])
+        for allergy in allergies or []:
+            terms.update(ALLERGY_FILTERS.get(allergy.lower(), []))
+        return sorted(terms)
+
+    def mask(self, dietary_prefs=None, allergies=None) -> np.ndarray:
+        """Boolean row mask of recipes that pass every requested filter."""
+        terms = self.excluded_terms(dietary_prefs, allergies)
+        if not terms:
+            return np.ones(self.bits.shape[0], dtype=bool)
+        cols = [self.column[t] for t in terms]
+        return ~self.bits[:, cols].any(axis=1)
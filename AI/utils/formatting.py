@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# ---- Vectorized ingestion ----
+# Column-at-a-time cleaning, run once per corpus load so responses are a
+# column slice instead of per-row regex work.
+IMAGE_FALLBACK = "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcT27gTKHqKhHk3i-EiarE5Q9IND_awvKaKjxw&s"
+
+def _unwrap(values: pd.Series) -> pd.Series:
+    """Strip the R-style c("...") wrappers and quotes."""
+    return (values.str.replace("c(", "", regex=False)
+                  .str.replace(")", "", regex=False)
+                  .str.replace('"', "", regex=False))
+
+def split_flat(values: pd.Series, pattern: str):
+    """split_lists as one flat item array plus row bounds: row i is items[bounds[i]:bounds[i + 1]]."""
+    bounds = np.zeros(len(values) + 1, dtype=np.int64)
+    if not len(values):
+        return np.empty(0, dtype=object), bounds
+    # Explode keeps rows in order, so each row's parts are one contiguous run
+    parts = _unwrap(values.reset_index(drop=True)).str.split(pattern, regex=True).explode().str.strip()
+    keep = (parts.notna() & (parts != "")).to_numpy(dtype=bool)
+    rows = parts.index.to_numpy()[keep]
+    bounds[1:-1] = np.searchsorted(rows, np.arange(1, len(values)))
+    bounds[-1] = len(rows)
+    return parts.to_numpy(dtype=object)[keep], bounds
+
+def split_lists(values: pd.Series, pattern: str) -> pd.Series:
+    """Unwrapped items of every row split on ``pattern`` (ingredients, instruction steps)."""
+    items, bounds = split_flat(values, pattern)
+    return pd.Series([items[a:b].tolist() for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())],
+                     index=values.index, dtype=object)
+
+def duration_parts(values: pd.Series) -> pd.DataFrame:
+    """Hours and minutes of ISO8601 PT1H20M durations (0 where unparseable)."""
+    parts = values.astype("string").str.extract(r"^PT(?:(\d+)H)?(?:(\d+)M)?")
+    return pd.DataFrame({
+        "hours": pd.to_numeric(parts[0]).fillna(0).astype("int64"),
+        "minutes": pd.to_numeric(parts[1]).fillna(0).astype("int64"),
+    }, index=values.index)
+
+def duration_minutes(values: pd.Series) -> pd.Series:
+    """Whole minutes of ISO8601 durations as float64, NaN when missing or unparseable."""
+    parts = values.astype("string").str.extract(r"^PT(?:(\d+)H)?(?:(\d+)M)?")
+    hours, minutes = pd.to_numeric(parts[0]), pd.to_numeric(parts[1])
+    total = hours.fillna(0) * 60 + minutes.fillna(0)
+    return total.where(hours.notna() | minutes.notna()).astype("float64")
+
+def duration_text(values: pd.Series) -> pd.Series:
+    """ISO8601 durations as '1h 20m', 'N/A' when missing or zero."""
+    parts = duration_parts(values)
+    text = parts["hours"].astype(str) + "h " + parts["minutes"].astype(str) + "m"
+    return text.where((parts["hours"] > 0) | (parts["minutes"] > 0), "N/A").astype(object)
+
+def search_image_urls(values: pd.Series) -> pd.Series:
+    """First image URL of each row, the fallback image when empty or an error message."""
+    url = (values.str.split(",", n=1).str[0].str.strip()
+                 .str.removeprefix("c(").str.removesuffix(")")
+                 .str.strip('"').str.strip())
+    broken = (values == "") | values.str.startswith("Error: Message")
+    return url.where(~broken, IMAGE_FALLBACK).astype(object)
+
+def detail_image_urls(values: pd.Series) -> pd.Series:
+    """Every image URL of a recipe, unwrapped, as /recipe/{id} returns it."""
+    return _unwrap(values).astype(object)
@@ -0,0 +1,148 @@
+import bisect
+import heapq
+import os
+import re
+from difflib import SequenceMatcher
+import numpy as np
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+WORDS_PATH = os.path.join(UTILS_DIR, "nlpWords.txt")
+TERMS_PATH = os.path.join(UTILS_DIR, "nlpTerms.tsv")
+
+# Words are runs of 2+ letters: digits, punctuation and R's c("...") wrappers split them
+TOKEN_RE = re.compile(r"[^\W\d_]{2,}")
+
+def tokenize(text: str):
+    return TOKEN_RE.findall(text.lower())
+
+# Character buckets for the count signatures: a-z, digits, space, anything else
+_BUCKETS = 29
+
+def _bucket(ch: str) -> int:
+    if "a" <= ch <= "z":
+        return ord(ch) - 97
+    if ch.isdigit():
+        return 26
+    return 27 if ch == " " else 28
+
+def _signature(word: str) -> np.ndarray:
+    sig = np.zeros(_BUCKETS, dtype=np.uint16)
+    for ch in word:
+        sig[_bucket(ch)] += 1
+    return sig
+
+
+class FuzzyMatcher:
+    """Indexed drop-in for ``difflib.get_close_matches`` over a fixed vocabulary.
+
+    Each word is stored with a character-count signature. For a query, one
+    vectorized pass turns the signatures into an upper bound on
+    ``SequenceMatcher.ratio()`` for every word. Candidates are then scored in
+    bound order and the scan stops as soon as no remaining word can beat the
+    current top n. The answer is identical to difflib's, without scoring the
+    whole vocabulary.
+    """
+
+    def __init__(self, words, weights=None):
+        # Optional weights (document frequencies) order prefix completions
+        merged = {}
+        for word, weight in zip(words, weights if weights is not None else [0] * len(words)):
+            word = word.strip().lower() if word else ""
+            if word:
+                merged[word] = max(weight, merged.get(word, 0))
+        self.words = sorted(merged)
+        self.weights = np.array([merged[w] for w in self.words], dtype=np.int64)
+        self._lengths = np.array([len(w) for w in self.words], dtype=np.int32)
+        self._signatures = (np.vstack([_signature(w) for w in self.words])
+                            if self.words else np.zeros((0, _BUCKETS), dtype=np.uint16))
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        i = bisect.bisect_left(self.words, word)
+        return i < len(self.words) and self.words[i] == word
+
+    @classmethod
+    def from_file(cls, path: str = WORDS_PATH) -> "FuzzyMatcher":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls([line for line in f])
+
+    @classmethod
+    def from_terms(cls, path: str = TERMS_PATH) -> "FuzzyMatcher":
+        """Load the term/tf/df table written by build_nlp_words.py, weighted by df."""
+        words, weights = [], []
+        with open(path, "r", encoding="utf-8") as f:
+            next(f, None)  # header
+            for line in f:
+                term, _, df = line.rstrip("\n").split("\t")
+                words.append(term)
+                weights.append(int(df))
+        return cls(words, weights)
+
+    def complete(self, prefix: str, n: int = 10):
+        """Up to ``n`` vocabulary words starting with ``prefix``.
+
+        Most frequent first when the matcher has weights, else alphabetical.
+        """
+        prefix = prefix.strip().lower()
+        if not prefix or n <= 0:
+            return []
+        start = bisect.bisect_left(self.words, prefix)
+        # Every word with this prefix sorts before prefix + the highest code point
+        end = bisect.bisect_left(self.words, prefix + "\U0010ffff", start)
+        if not self.weights.any():
+            return self.words[start:min(end, start + n)]
+        order = np.argsort(-self.weights[start:end], kind="stable")[:n]
+        return [self.words[start + i] for i in order.tolist()]
+
+    def upper_bounds(self, word: str) -> np.ndarray:
+        """Bag-of-characters bound (>= quick_ratio >= ratio) for every word."""
+        shared = np.minimum(self._signatures, _signature(word)).sum(axis=1)
+        return 2.0 * shared / (self._lengths + len(word))
+
+    def get_close_matches(self, word: str, n: int = 3, cutoff: float = 0.6):
+        """Up to ``n`` vocabulary words scoring at least ``cutoff``, best first."""
+        word = word.strip().lower()
+        if not word or n <= 0 or not self.words:
+            return []
+        bounds = self.upper_bounds(word)
+        ids = np.flatnonzero(bounds >= cutoff)
+        ids = ids[np.argsort(-bounds[ids], kind="stable")]
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(word)
+        best = []  # min-heap of (score, word), like difflib's nlargest
+        for i in ids:
+            if len(best) == n and bounds[i] < best[0][0]:
+                break  # nothing left can displace the current top n
+            matcher.set_seq1(self.words[i])
+            score = matcher.ratio()
+            if score >= cutoff:
+                item = (score, self.words[i])
+                if len(best) < n:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+        return [w for _, w in sorted(best, reverse=True)]
+
+    def correct(self, text: str, cutoff: float = 0.75, known=frozenset()):
+        """Swap unknown query terms for their closest vocabulary word.
+
+        Terms in the vocabulary or in ``known`` (e.g. the search index's own
+        terms and stop words) are kept, as are terms with no close match.
+        Returns the corrected text and a ``{term: replacement}`` dict. Only
+        the corrected words are replaced; numbers, punctuation and every
+        other part of ``text`` are kept as written.
+        """
+        corrections = {}
+        terms = tokenize(text)
+        for term in terms:
+            if len(term) < 3 or term in known or term in self or term in corrections:
+                continue
+            match = self.get_close_matches(term, n=1, cutoff=cutoff)
+            if match:
+                corrections[term] = match[0]
+        if not corrections:
+            return text, corrections
+        return TOKEN_RE.sub(lambda m: corrections.get(m.group().lower(), m.group()), text), corrections
@@ -0,0 +1,225 @@
+"""Per-request stage timing, Prometheus-style metrics and one-off profiles.
+
+Code marks the expensive parts of a request with ``stage``::
+
+    with stage("score"):
+        sims = index.score(text)
+
+Spans are only recorded inside ``collect_stages`` (the scoring job wrapper)
+or a request seen by ``TimingMiddleware``; anywhere else ``stage`` costs
+one context-variable lookup. The middleware times every request, returns
+its spans as a ``Server-Timing`` header and feeds the histograms that
+``Metrics.render`` writes in the Prometheus text format. Metrics live per
+process, so scrape every uvicorn worker.
+"""
+import bisect
+import contextvars
+import cProfile
+import io
+import pstats
+import threading
+import time
+from urllib.parse import parse_qs
+
+_spans = contextvars.ContextVar("cookmate_spans", default=None)
+# X-Admin-Token sent with a ``?profile=1`` request ("" without one); None otherwise
+_profiling = contextvars.ContextVar("cookmate_profiling", default=None)
+
+# Seconds; spans run from microseconds (detail lookups) to seconds (cold searches)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+           0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ---- Spans ----
+class stage:
+    """Context manager that records how long its block took under ``name``."""
+
+    __slots__ = ("name", "_spans", "_started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._spans = _spans.get()
+        if self._spans is not None:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._spans is not None:
+            self._spans.append((self.name, time.perf_counter() - self._started))
+
+
+class collect_stages:
+    """Collect the ``stage`` spans run in this context into ``spans``."""
+
+    def __enter__(self):
+        self.spans = []
+        self.started = time.perf_counter()
+        self._token = _spans.set(self.spans)
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.started
+        _spans.reset(self._token)
+
+
+def record_spans(spans):
+    """Add spans measured elsewhere (e.g. on a scoring worker) to the current request."""
+    current = _spans.get()
+    if current is not None:
+        current.extend(spans)
+
+
+def profiling() -> bool:
+    """True when the current request asked for a profile (``?profile=1``)."""
+    return _profiling.get() is not None
+
+
+def profile_token() -> str:
+    """The ``X-Admin-Token`` header of a profiling request, for the route to check."""
+    return _profiling.get() or ""
+
+
+_profile_lock = threading.Lock()
+
+def profile_call(fn, *args, limit: int = 40):
+    """``fn(*args)`` under cProfile; returns the result and the top ``limit`` functions by cumulative time."""
+    profiler = cProfile.Profile()
+    with _profile_lock:  # one profiler at a time per process
+        profiler.enable()
+        try:
+            result = fn(*args)
+        finally:
+            profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return result, out.getvalue()
+
+
+def server_timing(spans, total: float) -> str:
+    """``Server-Timing`` header value; repeated stages are summed, durations in ms."""
+    totals = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items()]
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+# ---- Metrics ----
+def _labels(names, values) -> str:
+    escaped = (str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n") for v in values)
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, escaped))
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination."""
+
+    def __init__(self, name: str, help: str, labels, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for values, counts in sorted(series.items()):
+            labels = _labels(self.labels, values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {counts[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Request and stage histograms plus gauges/counters read at scrape time."""
+
+    def __init__(self):
+        self.requests = Histogram("cookmate_request_duration_seconds",
+                                  "Request latency by route, method and status.", ("route", "method", "status"))
+        self.stages = Histogram("cookmate_stage_duration_seconds",
+                                "Time spent in each stage of a request.", ("route", "stage"))
+        self._collectors = []
+
+    def collector(self, fn):
+        """Register ``fn() -> [(name, type, help, value)]``, read on every scrape."""
+        self._collectors.append(fn)
+        return fn
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float, spans):
+        self.requests.observe((route, method, str(status)), seconds)
+        for name, span in spans:
+            self.stages.observe((route, name), span)
+
+    def render(self) -> str:
+        lines = self.requests.render() + self.stages.render()
+        for collect in self._collectors:
+            for name, kind, help, value in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+# ---- Middleware ----
+class TimingMiddleware:
+    """Times every HTTP request, adds ``Server-Timing`` and records the metrics.
+
+    ``?profile=1`` marks the request for profiling (see ``profiling``). The
+    route checks ``profile_token`` before profiling, so a refusal is an
+    ordinary error response that passes through the CORS middleware.
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    def _wants_profile(self, scope) -> bool:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        return query.get("profile", ["0"])[-1].lower() in ("1", "true", "yes")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = None
+        if self._wants_profile(scope):
+            profile = dict(scope.get("headers") or []).get(b"x-admin-token", b"").decode("latin-1")
+
+        spans = []
+        spans_token, profile_token = _spans.set(spans), _profiling.set(profile)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(spans, time.perf_counter() - started).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            _spans.reset(spans_token)
+            _profiling.reset(profile_token)
+            # Label by route template, never the raw path, to keep series bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe_request(route, scope["method"], status, elapsed, spans)
@@ -0,0 +1,172 @@
+"""Precomputed top-K neighbours of every recipe for /recommend/by_recipe.
+
+A recipe's neighbours only change when the corpus does, so compute them
+offline from the AI/ directory with::
+
+    python -m utils.neighbours [--k 50] [--workers 4]
+
+Rows are scored in blocks (one sparse product per block, sized to bound
+memory) across a process pool, ranked with the same tie-breaking as the live
+recommender, and saved as ``rows.npy`` (int32 positions, -1 padded) and
+``scores.npy`` (float32) plus the recipe ids they were built for, inside the
+search index directory (``COOKMATE_INDEX_DIR``, default ``utils/index``).
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from utils.ranking import top_k
+from utils.search_index import INDEX_DIR
+
+# Kept inside the search index directory, so COOKMATE_INDEX_DIR moves both
+NEIGHBOURS = "neighbours"
+NEIGHBOURS_DIR = os.path.join(INDEX_DIR, NEIGHBOURS)
+FORMAT_VERSION = 1
+# Upper bound on similarity entries in flight (rows x corpus, worst case),
+# shared by all workers since each one holds its own block
+_BLOCK_ENTRIES = 2**27
+
+
+class NeighbourTable:
+    """Top-K neighbour positions per recipe row, best first."""
+
+    def __init__(self, rows, scores, ids, nnz=None, source=None):
+        self.rows = rows
+        self.scores = scores
+        self.ids = ids
+        self.nnz = nnz
+        self.source = source  # stamp of the CSV it was built from (RecipeStore.stamp)
+
+    @property
+    def k(self) -> int:
+        return self.rows.shape[1]
+
+    def matches(self, recommender) -> bool:
+        """True when the table was built from this corpus version and TF-IDF matrix."""
+        ids = recommender.store.ids
+        return (self.source == recommender.store.stamp
+                and len(ids) == len(self.ids) and np.array_equal(ids, self.ids)
+                and self.nnz == recommender.tfidf_matrix.nnz)
+
+    def lookup(self, row: int, n: int, mask=None):
+        """The best ``n`` allowed neighbours of ``row``, or None if the table can't tell.
+
+        Only positive-similarity neighbours are stored. When fewer than ``n``
+        of them pass the mask, the live path has to rank the rest (or pad
+        with zero-score rows), so we return None and leave it to that.
+        """
+        rows = self.rows[row]
+        rows = rows[rows >= 0]
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return rows[:n] if len(rows) >= n else None
+
+    # ---- On-disk format ----
+    def save(self, path: str = NEIGHBOURS_DIR):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "rows.npy"), self.rows.astype(np.int32))
+        np.save(os.path.join(path, "scores.npy"), self.scores.astype(np.float32))
+        np.save(os.path.join(path, "ids.npy"), np.asarray(self.ids, dtype=np.int64))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "k": self.k, "nnz": self.nnz, "source": self.source}, f)
+
+    @classmethod
+    def load(cls, path: str = NEIGHBOURS_DIR, mmap: bool = True) -> "NeighbourTable":
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported neighbour table version: {meta.get('version')}")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+                  for name in ("rows", "scores", "ids")}
+        return cls(arrays["rows"], arrays["scores"], arrays["ids"], meta.get("nnz"), meta.get("source"))
+
+
+def load_neighbours(recommender, path: str = NEIGHBOURS_DIR):
+    """Memory-map the prebuilt table when it matches ``recommender``, else None."""
+    if recommender is None or not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    try:
+        table = NeighbourTable.load(path)
+    except (OSError, ValueError) as e:
+        print(f"Could not load neighbour table from {path}: {e}")
+        return None
+    if not table.matches(recommender):
+        print(f"Neighbour table at {path} does not match the corpus; using live search.")
+        return None
+    return table
+
+
+# ---- Offline build ----
+_shared = {}
+
+def _init_worker(matrix, postings, ratings, ids):
+    _shared.update(matrix=matrix, postings=postings, ratings=ratings, ids=ids)
+
+
+def _block_neighbours(start, stop, k):
+    """Top-k neighbours for matrix rows [start, stop), ranked like the recommender."""
+    sims = (_shared["matrix"][start:stop] @ _shared["postings"]).tocsr()
+    ratings, ids = _shared["ratings"], _shared["ids"]
+    rows = np.full((stop - start, k), -1, dtype=np.int32)
+    scores = np.zeros((stop - start, k), dtype=np.float32)
+    for i in range(stop - start):
+        lo, hi = sims.indptr[i], sims.indptr[i + 1]
+        cols, vals = sims.indices[lo:hi], sims.data[lo:hi]
+        keep = (cols != start + i) & (vals > 0)  # never the recipe itself
+        cols, vals = cols[keep], vals[keep]
+        chosen = top_k(vals, k, ratings=ratings[cols], ids=ids[cols])
+        rows[i, :len(chosen)] = cols[chosen]
+        scores[i, :len(chosen)] = vals[chosen]
+    return start, rows, scores
+
+
+def build_neighbours(recommender, k: int = 50, block: int = None, workers: int = 1) -> NeighbourTable:
+    matrix = recommender.tfidf_matrix.tocsr()
+    n = matrix.shape[0]
+    k = max(1, min(k, n - 1))
+    workers = max(1, workers)
+    block = block or max(1, _BLOCK_ENTRIES // (max(1, n) * workers))
+    args = (matrix, recommender.index.postings, recommender.store.ratings, recommender.store.ids)
+    rows = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+
+    starts = range(0, n, block)
+    if workers <= 1:
+        _init_worker(*args)
+        results = (_block_neighbours(s, min(s + block, n), k) for s in starts)
+        for start, block_rows, block_scores in results:
+            rows[start:start + len(block_rows)] = block_rows
+            scores[start:start + len(block_rows)] = block_scores
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args) as pool:
+            futures = [pool.submit(_block_neighbours, s, min(s + block, n), k) for s in starts]
+            for future in futures:
+                start, block_rows, block_scores = future.result()
+                rows[start:start + len(block_rows)] = block_rows
+                scores[start:start + len(block_rows)] = block_scores
+    return NeighbourTable(rows, scores, args[3].astype(np.int64), matrix.nnz, recommender.store.stamp)
+
+
+if __name__ == "__main__":
+    from utils.ai_recommender import RecipeRecommender
+    from utils.recipe_store import RecipeStore
+
+    parser = argparse.ArgumentParser(description="Precompute top-K recipe neighbours")
+    parser.add_argument("--k", type=int, default=50, help="neighbours kept per recipe")
+    parser.add_argument("--block", type=int, default=0, help="rows per sparse product (default: sized by corpus)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--index-dir", default=os.getenv("COOKMATE_INDEX_DIR") or INDEX_DIR,
+                        help="search index directory the table is saved in (default: $COOKMATE_INDEX_DIR or utils/index)")
+    args = parser.parse_args()
+    path = os.path.join(args.index_dir, NEIGHBOURS)
+
+    started = time.perf_counter()
+    recommender = RecipeRecommender(store=RecipeStore.load())
+    table = build_neighbours(recommender, k=args.k, block=args.block or None, workers=args.workers)
+    table.save(path)
+    print(f"Built {path}: {len(table.rows)} recipes x {table.k} neighbours "
+          f"in {time.perf_counter() - started:.2f}s")
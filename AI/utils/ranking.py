@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def top_k(scores, k, ratings=None, ids=None, mask=None) -> np.ndarray:
+    """Row positions of the ``k`` best ``scores``, best first.
+
+    A partial selection (``np.partition``) finds the k-th best score, and the
+    rows tied with it are narrowed the same way on rating then id, so at
+    most ``k`` rows are ever sorted. Ties are broken deterministically by higher
+    rating (missing ratings last), then lower id, then row position. Rows
+    where ``mask`` is False are never returned.
+    """
+    scores = np.asarray(scores)
+    candidates = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+    if k <= 0 or len(candidates) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    cand_scores = scores if mask is None else scores[candidates]
+    rating_key = None
+    if ratings is not None:
+        rating_key = lambda rows: _rating_key(np.asarray(ratings, dtype=float)[rows])
+    id_key = (lambda rows: np.asarray(ids)[rows]) if ids is not None else None
+
+    if k < len(candidates):
+        # Rows above the k-th score are in; only the group tied with it needs
+        # tie-breaking, and only for the slots left. Sparse TF-IDF scores often
+        # tie most of the corpus at 0, so that group is selected, never sorted.
+        neg = -cand_scores
+        kth = np.partition(neg, k - 1)[k - 1]
+        above = neg < kth
+        tied = candidates[neg == kth]
+        keys = [key for key in (rating_key, id_key) if key is not None]
+        candidates = np.concatenate([candidates[above], _select(tied, k - int(above.sum()), keys)])
+
+    keys = [candidates]
+    if id_key is not None:
+        keys.insert(0, id_key(candidates))
+    if rating_key is not None:
+        keys.insert(0, rating_key(candidates))
+    keys.insert(0, -scores[candidates])
+    # lexsort uses the last key as the primary one
+    order = np.lexsort(keys[::-1])
+    return candidates[order[:k]]
+
+
+def _rating_key(values):
+    """Higher rating first, missing ratings last."""
+    key = -values
+    key[np.isnan(key)] = np.inf
+    return key
+
+
+def _select(rows, n, keys):
+    """The ``n`` rows smallest by ``keys`` then position (``rows`` ascending), unordered."""
+    chosen = []
+    for key in keys:
+        if len(rows) <= n:
+            return np.concatenate(chosen + [rows])
+        values = key(rows)
+        kth = np.partition(values, n - 1)[n - 1]
+        better = rows[values < kth]
+        chosen.append(better)
+        n -= len(better)
+        rows = rows[values == kth]
+    return np.concatenate(chosen + [rows[:n]])
@@ -0,0 +1,329 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from utils.corpus import CSV_PATH, corpus_dir_for, is_fresh, read_corpus, source_stamp
+from utils.cuisine import CUISINE_IDS, CUISINE_NAMES, cuisine_counts, tag_cuisines
+from utils.dietary import FILTER_TERMS, TermBitmaps
+from utils.formatting import (detail_image_urls, duration_minutes, duration_text,
+                              search_image_urls, split_flat)
+from utils.text_columns import TextColumn, TextLists
+
+# Range filter name -> numeric column, for RecipeStore.range_mask
+RANGE_COLUMNS = {
+    "calories": "calories",
+    "cook_time": "cookMinutes",
+    "protein": "proteinContent",
+    "carbs": "carbohydrateContent",
+    "fat": "fatContent",
+    "fiber": "fiberContent",
+}
+# Recipe ids are int64; larger request ids can't name a recipe
+INT64_MIN, INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+# Corpus columns normalize_recipes reads; the store decodes nothing else
+STORE_COLUMNS = [
+    "RecipeId", "Name", "RecipeIngredientParts", "RecipeInstructions", "Description",
+    "TotalTime", "CookTime", "TotalMinutes", "CookMinutes", "CuisineId", "Calories", "Images",
+    "AggregatedRating", "FatContent", "ProteinContent", "CarbohydrateContent", "FiberContent",
+]
+
+
+def _column(csv: pd.DataFrame, name: str) -> pd.Series:
+    """Return a column, or an all-NaN one when the CSV does not have it."""
+    if name in csv.columns:
+        return csv[name]
+    return pd.Series([None] * len(csv), index=csv.index, dtype=object)
+
+
+def _text(csv: pd.DataFrame, name: str, fallback: str = None) -> pd.Series:
+    """String column with missing values as "" (never the literal "nan")."""
+    col = _column(csv, name)
+    if fallback is not None:
+        col = col.fillna(_column(csv, fallback))
+    return col.fillna("").astype(str)
+
+
+def _numeric(csv: pd.DataFrame, name: str) -> pd.Series:
+    return pd.to_numeric(_column(csv, name), errors="coerce")
+
+
+def _minutes(csv: pd.DataFrame, raw: str, derived: str) -> pd.Series:
+    """Minutes precomputed by the corpus, or parsed here for a raw CSV."""
+    if derived in csv.columns:
+        return pd.to_numeric(csv[derived], errors="coerce")
+    return duration_minutes(_column(csv, raw))
+
+
+def normalize_recipes(csv: pd.DataFrame) -> pd.DataFrame:
+    """Map the raw CSV onto the typed, cleaned columns the API serves."""
+    if csv.empty or "RecipeId" not in csv.columns:
+        return pd.DataFrame()
+
+    df = pd.DataFrame({
+        "id": pd.to_numeric(csv["RecipeId"], errors="coerce"),
+        "name": csv["Name"],
+        "ingredients": _text(csv, "RecipeIngredientParts"),
+        "instructions": _text(csv, "RecipeInstructions", fallback="Description"),
+        "cookTime": _column(csv, "TotalTime").fillna(_column(csv, "CookTime")),
+        "cookMinutes": _minutes(csv, "TotalTime", "TotalMinutes").fillna(_minutes(csv, "CookTime", "CookMinutes")),
+        # Tagged by the corpus build; a raw CSV is tagged here
+        "cuisineId": csv["CuisineId"] if "CuisineId" in csv.columns else tag_cuisines(csv),
+        "calories": _numeric(csv, "Calories"),
+        "imageUrl": _text(csv, "Images"),
+        "avgRate": _numeric(csv, "AggregatedRating"),
+        "fatContent": _numeric(csv, "FatContent"),
+        "proteinContent": _numeric(csv, "ProteinContent"),
+        "carbohydrateContent": _numeric(csv, "CarbohydrateContent"),
+        "fiberContent": _numeric(csv, "FiberContent"),
+    }).dropna(subset=["id", "name"])
+
+    df["id"] = df["id"].astype("int64")
+    df["name"] = df["name"].astype(str)
+    return df.reset_index(drop=True)
+
+
+# ---- Flat arrays ----
+# Everything the serving path reads, as row-aligned numpy arrays: ids,
+# ratings, filter bitmaps, range columns and the response text (see
+# utils.text_columns). ``python -m utils.corpus`` saves them as .npy next to
+# the columnar corpus; every worker memory-maps the same read-only pages and
+# never builds a per-row Python object.
+ARRAYS_VERSION = 2
+
+
+def arrays_dir_for(csv_path: str = CSV_PATH) -> str:
+    return os.path.join(corpus_dir_for(csv_path), "arrays")
+
+
+def store_arrays(frame: pd.DataFrame) -> dict:
+    """Compute the flat arrays for a normalized frame."""
+    n = len(frame)
+    column = lambda name, dtype: (frame[name].to_numpy(dtype=dtype) if name in frame.columns
+                                  else np.full(n, np.nan if dtype == np.float64 else -1, dtype=dtype))
+    text = lambda name: frame[name] if name in frame.columns else pd.Series([""] * n, dtype=object)
+    ids = column("id", np.int64)
+    # Primary-key index: ids sorted once, looked up with searchsorted.
+    # A stable sort keeps the first row when an id is duplicated.
+    id_order = np.argsort(ids, kind="stable")
+    # Lowercase titles, sorted the same way, for by-title lookups
+    title_keys = text("name").str.lower()
+    arrays = {
+        "ids": ids,
+        "id_order": id_order,
+        "sorted_ids": ids[id_order],
+        "title_order": np.argsort(title_keys.to_numpy(dtype=object), kind="stable"),
+        "ratings": column("avgRate", np.float64),
+        "cuisine_ids": column("cuisineId", np.int8),
+        "term_bits": TermBitmaps.scan(frame),
+    }
+    # Contiguous float arrays for the range filters (NaN never passes a bound)
+    for name, col in RANGE_COLUMNS.items():
+        arrays[f"range_{name}"] = column(col, np.float64)
+
+    # Response text, cleaned once: blobs for per-recipe strings, distinct
+    # values stored once for images and cook times, interned list items
+    texts = {
+        "name": TextColumn.encode(text("name")),
+        "title_key": TextColumn.encode(title_keys),
+        "ingredients": TextColumn.encode(text("ingredients")),
+        "ingredient_list": TextLists.encode(*split_flat(text("ingredients"), r"[;,]")),
+        "steps": TextLists.encode(*split_flat(text("instructions"), r"\.|\n")),
+        "cook_time": TextColumn.encode(duration_text(text("cookTime")), dedupe=True),
+        "image": TextColumn.encode(search_image_urls(text("imageUrl")), dedupe=True),
+        "images": TextColumn.encode(detail_image_urls(text("imageUrl")), dedupe=True),
+    }
+    for prefix, values in texts.items():
+        arrays.update(values.arrays(prefix))
+    for values in arrays.values():
+        values.flags.writeable = False  # same contract as the mmapped copy
+    return arrays
+
+
+def save_arrays(arrays: dict, path: str, source: dict = None):
+    os.makedirs(path, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), values)
+    meta = {"version": ARRAYS_VERSION, "rows": len(arrays["ids"]), "arrays": sorted(arrays),
+            "terms": FILTER_TERMS, "cuisines": CUISINE_NAMES, "source": source}
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_arrays(csv_path: str, mmap: bool = True):
+    """Memory-map the arrays saved for this corpus, or None if missing or stale."""
+    path = arrays_dir_for(csv_path)
+    if not is_fresh(csv_path, path):  # same CSV stamp and cuisine list as when saved
+        return None
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != ARRAYS_VERSION or meta.get("terms") != FILTER_TERMS:
+        return None
+    try:
+        return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                for name in meta["arrays"]}
+    except (OSError, ValueError) as e:
+        print(f"Could not load store arrays from {path}: {e}")
+        return None
+
+
+def build_arrays(csv_path: str = CSV_PATH) -> str:
+    """Save the flat arrays for the corpus next to ``csv_path`` (run after the corpus build)."""
+    with open(os.path.join(corpus_dir_for(csv_path), "meta.json"), encoding="utf-8") as f:
+        source = json.load(f).get("source")
+    path = arrays_dir_for(csv_path)
+    save_arrays(store_arrays(normalize_recipes(read_corpus(csv_path, columns=STORE_COLUMNS))), path, source)
+    return path
+
+
+def _number(value):
+    """float for JSON, None for NaN."""
+    return None if value != value else float(value)
+
+
+class RecipeStore:
+    """Normalized recipe corpus, built once and shared read-only by every route.
+
+    Everything is held as read-only arrays (``store_arrays``); response
+    dicts are built only for the rows a request returns. Pass a normalized
+    ``frame`` to derive the arrays, or ``arrays`` saved by ``build_arrays``.
+    """
+
+    def __init__(self, frame: pd.DataFrame = None, source: str = None, arrays: dict = None,
+                 stamp: dict = None):
+        self.source = source
+        self.stamp = stamp  # corpus.source_stamp of the CSV; indexes built from this store record it
+        # Mmapped from the corpus build when given, derived from the frame otherwise
+        self.arrays = arrays if arrays is not None else store_arrays(frame)
+        self.ids = self.arrays["ids"]
+        self.ratings = self.arrays["ratings"]
+        self.term_bitmaps = TermBitmaps(self.arrays["term_bits"])
+        self._id_order = self.arrays["id_order"]
+        self._sorted_ids = self.arrays["sorted_ids"]
+        self._title_order = self.arrays["title_order"]
+        self.numeric = {name: self.arrays[f"range_{name}"] for name in RANGE_COLUMNS}
+        self.cuisine_ids = self.arrays["cuisine_ids"]
+        self.cuisines = cuisine_counts(self.cuisine_ids)
+
+        self.names = TextColumn.from_arrays(self.arrays, "name")
+        self.title_keys = TextColumn.from_arrays(self.arrays, "title_key")
+        self.ingredients = TextColumn.from_arrays(self.arrays, "ingredients")  # raw CSV text
+        self.ingredient_lists = TextLists.from_arrays(self.arrays, "ingredient_list")
+        self.instructions = TextLists.from_arrays(self.arrays, "steps")
+        self.cook_times = TextColumn.from_arrays(self.arrays, "cook_time")
+        self.images = TextColumn.from_arrays(self.arrays, "image")  # first URL or fallback
+        self.all_images = TextColumn.from_arrays(self.arrays, "images")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.ids) == 0
+
+    def positions(self, recipe_ids) -> np.ndarray:
+        """Row position for each id, or -1 where the id is unknown (or outside int64)."""
+        in_range = None
+        if not isinstance(recipe_ids, np.ndarray):
+            recipe_ids = list(recipe_ids)
+            in_range = np.array([INT64_MIN <= int(rid) <= INT64_MAX for rid in recipe_ids], dtype=bool)
+            recipe_ids = [rid if ok else 0 for rid, ok in zip(recipe_ids, in_range)]
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        if not len(self._sorted_ids):
+            return np.full(len(recipe_ids), -1, dtype=np.intp)
+        at = np.searchsorted(self._sorted_ids, recipe_ids).clip(max=len(self._sorted_ids) - 1)
+        found = np.where(self._sorted_ids[at] == recipe_ids, self._id_order[at], -1)
+        return found if in_range is None else np.where(in_range, found, -1)
+
+    def title_row(self, title: str):
+        """First row whose name matches ``title`` case-insensitively, or None."""
+        key = title.lower()
+        order, keys = self._title_order, self.title_keys
+        lo, hi = 0, len(order)
+        while lo < hi:  # leftmost match, so duplicate titles resolve to the first row
+            mid = (lo + hi) // 2
+            if keys[order[mid]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return int(order[lo]) if lo < len(order) and keys[order[lo]] == key else None
+
+    def search_record(self, row: int) -> dict:
+        """/search result fields for one row."""
+        return {
+            "recipeId": int(self.ids[row]),
+            "name": self.names[row],
+            "ingredients": self.ingredient_lists[row],
+            "instructions": self.instructions[row],
+            "cookTime": self.cook_times[row],
+            "calories": _number(self.numeric["calories"][row]),
+            "imageUrl": self.images[row],
+            "avgRate": _number(self.ratings[row]),
+        }
+
+    def search_records(self, positions):
+        """/search result dicts for the given row positions, in order."""
+        return [self.search_record(row) for row in np.asarray(positions).tolist()]
+
+    def detail_record(self, row: int) -> dict:
+        """/recipe/{id} payload for one row: the search fields plus every image and macros."""
+        return {
+            **self.search_record(row),
+            "imageUrl": self.all_images[row],
+            "fatContent": _number(self.numeric["fat"][row]),
+            "proteinContent": _number(self.numeric["protein"][row]),
+            "carbohydrateContent": _number(self.numeric["carbs"][row]),
+            "fiberContent": _number(self.numeric["fiber"][row]),
+        }
+
+    def detail(self, recipe_id: int):
+        """Detail payload for one recipe, or None."""
+        pos = self.positions([recipe_id])[0]
+        return self.detail_record(pos) if pos >= 0 else None
+
+    def text(self, name: str) -> pd.Series:
+        """A raw text column decoded in full (``"name"``/``"ingredients"``), for offline builds."""
+        return {"name": self.names, "ingredients": self.ingredients}[name].series()
+
+    def range_mask(self, bounds: dict, out: np.ndarray = None) -> np.ndarray:
+        """Rows within every ``{name: (min, max)}`` bound; None leaves a side open.
+
+        ANDs into ``out`` in place when given, so filters chain without copies.
+        """
+        mask = np.ones(len(self), dtype=bool) if out is None else out
+        scratch = np.empty(len(self), dtype=bool)
+        for name, (low, high) in bounds.items():
+            values = self.numeric[name]
+            if low is not None:
+                mask &= np.greater_equal(values, low, out=scratch)
+            if high is not None:
+                mask &= np.less_equal(values, high, out=scratch)
+        return mask
+
+    def cuisine_mask(self, cuisines) -> np.ndarray:
+        """Rows tagged with any of ``cuisines``.
+
+        Names outside the tagger's list fall back to matching the recipe name.
+        """
+        wanted = [c.strip().lower() for c in cuisines if c and c.strip()]
+        ids = [CUISINE_IDS[c] for c in wanted if c in CUISINE_IDS]
+        mask = np.isin(self.cuisine_ids, ids)
+        for c in wanted:
+            if c not in CUISINE_IDS:
+                mask |= self.title_keys.contains(c)
+        return mask
+
+    def dietary_mask(self, dietary_prefs=None, allergies=None):
+        """Row mask of recipes allowed by the dietary/allergy filters."""
+        return self.term_bitmaps.mask(dietary_prefs, allergies)
+
+    @classmethod
+    def load(cls, path: str = CSV_PATH) -> "RecipeStore":
+        """Memory-map the arrays saved for ``path``, else build from the corpus (or the CSV if stale)."""
+        arrays = load_arrays(path)
+        if arrays is not None:
+            return cls(source=path, arrays=arrays, stamp=source_stamp(path))
+        return cls(normalize_recipes(read_corpus(path, columns=STORE_COLUMNS)), source=path,
+                   stamp=source_stamp(path))
+
@@ -0,0 +1,123 @@
+"""Bounded pool for CPU-bound scoring, with admission control.
+
+Route handlers stay on the event loop and hand scoring jobs to
+``ScoringPool.run``. At most ``workers`` jobs run at once, at most
+``max_queue`` more wait for a slot, and a waiter gives up after
+``queue_timeout`` seconds. Past either limit ``run`` raises ``Overloaded``,
+which the API turns into a 503, so a burst of slow searches cannot starve
+``/health`` or ``/recipe`` lookups.
+
+``kind="thread"`` (the default) runs jobs in threads; NumPy/SciPy release the
+GIL in the heavy products. ``kind="process"`` forks worker processes that
+inherit the current snapshot copy-on-write and are re-forked when a newer
+snapshot is served. Jobs must then be module-level functions.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    """No scoring slot became free within the queue limits."""
+
+
+# Snapshot inherited by forked workers (process mode only)
+_forked_snapshot = None
+
+def _call_forked(fn, args):
+    return fn(_forked_snapshot, *args)
+
+
+class ScoringPool:
+    def __init__(self, kind: str = "thread", workers: int = 4, max_queue: int = 64,
+                 queue_timeout: float = 2.0):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown scoring pool kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._slots = None
+        self._slots_loop = None
+        self._generation = None
+        self._lock = threading.Lock()
+        self._executor = (ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring")
+                          if kind == "thread" else None)
+
+    def _process_executor(self, snapshot):
+        """The forked pool for ``snapshot``, re-forking once a newer one is live."""
+        global _forked_snapshot
+        with self._lock:
+            if self._executor is None or snapshot.generation > self._generation:
+                old = self._executor
+                _forked_snapshot = snapshot
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("fork"))
+                self._generation = snapshot.generation
+                if old is not None:
+                    old.shutdown(wait=False)  # running jobs finish on the old snapshot
+            return self._executor
+
+    def _submit(self, fn, snapshot, args):
+        if self.kind == "thread":
+            return self._executor.submit(fn, snapshot, *args)
+        return self._process_executor(snapshot).submit(_call_forked, fn, args)
+
+    def _semaphore(self, loop):
+        # asyncio primitives belong to one loop; servers have one, test clients may not
+        if self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.workers), loop
+        return self._slots
+
+    async def run(self, fn, snapshot, *args):
+        """``fn(snapshot, *args)`` on the pool, or ``Overloaded`` when saturated."""
+        loop = asyncio.get_running_loop()
+        slots = self._semaphore(loop)
+        if self.waiting >= self.max_queue and slots.locked():
+            self.rejected += 1
+            raise Overloaded("scoring queue is full")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(f"no scoring slot within {self.queue_timeout:g}s") from None
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            future = self._submit(fn, snapshot, args)
+        except BaseException:
+            self.in_flight -= 1
+            slots.release()
+            raise
+
+        def done(_):
+            # Free the slot when the job really ends, even if the client went away
+            self.in_flight -= 1
+            self.completed += 1
+            slots.release()
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(done, f))
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "maxQueue": self.max_queue,
+            "queueTimeout": self.queue_timeout,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,172 @@
+"""Prebuilt TF-IDF index over recipe name + ingredients.
+
+Build it offline from the AI/ directory with::
+
+    python -m utils.search_index [--min-df N]
+
+The index is a directory of plain ``.npy`` arrays (CSR data/indices/indptr,
+the same matrix term-major as ``postings_*``, idf weights, recipe ids) plus
+a ``vocab.txt``, so every API worker memory-maps the same read-only pages
+instead of refitting a vectorizer or transposing the matrix itself. With ``--min-df``
+the vocabulary is taken from ``nlpTerms.tsv`` (build_nlp_words.py) instead of
+being fitted, keeping only terms used by at least N recipes.
+
+The same command writes the recommender's ingredients-only index to
+``index/ingredients/``.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from utils.corpus import UTILS_DIR
+from utils.recipe_store import RecipeStore
+
+INDEX_DIR = os.path.join(UTILS_DIR, "index")
+# Recommender index (ingredients only), kept inside the search index directory
+INGREDIENT_INDEX = "ingredients"
+FORMAT_VERSION = 1
+
+
+def index_text(store):
+    """Text each recipe is indexed under."""
+    return store.text("name") + " " + store.text("ingredients")
+
+def ingredient_text(store):
+    """Text the recommender compares recipes on."""
+    return store.text("ingredients")
+
+TEXTS = {"search": index_text, "ingredients": ingredient_text}
+
+
+class SearchIndex:
+    """Fixed-vocabulary, L2-normalized TF-IDF matrix (one row per store row)."""
+
+    def __init__(self, vocabulary, idf, matrix, ids, text: str = "search", postings=None, source=None):
+        self.vocabulary = list(vocabulary)
+        self.idf = idf
+        self.matrix = matrix
+        self.ids = ids
+        self.text = text
+        self._postings = postings
+        self.source = source  # stamp of the CSV it was built from (RecipeStore.stamp)
+        self._counter = CountVectorizer(
+            stop_words="english",
+            vocabulary={term: i for i, term in enumerate(self.vocabulary)},
+        )
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def postings(self):
+        """Term-major (terms x recipes) CSR copy, so a query only walks its own terms."""
+        if self._postings is None:
+            self._postings = self.matrix.T.tocsr()
+        return self._postings
+
+    @classmethod
+    def build(cls, store: RecipeStore, vocabulary=None, text: str = "search") -> "SearchIndex":
+        tfidf = TfidfVectorizer(stop_words="english", vocabulary=vocabulary)
+        matrix = tfidf.fit_transform(TEXTS[text](store)).tocsr()
+        vocabulary = tfidf.get_feature_names_out()
+        return cls(vocabulary, tfidf.idf_, matrix, store.ids, text, source=store.stamp)
+
+    def transform(self, texts):
+        """Vectorize query strings against the fixed vocabulary."""
+        counts = self._counter.transform([t.lower() for t in texts])
+        return normalize(counts.multiply(self.idf).tocsr())
+
+    def score(self, text: str) -> np.ndarray:
+        """Cosine similarity of one query against every indexed recipe."""
+        return (self.transform([text]) @ self.postings).toarray().ravel()
+
+    def matches(self, store: RecipeStore) -> bool:
+        """True when the index was built from this version of the store's corpus."""
+        ids = store.ids
+        return (self.source == store.stamp and len(ids) == len(self.ids)
+                and np.array_equal(ids, self.ids))
+
+    # ---- On-disk format ----
+    def save(self, path: str = INDEX_DIR):
+        os.makedirs(path, exist_ok=True)
+        # scipy copies mismatched index arrays on load, so keep both in one dtype
+        index_dtype = np.int32 if self.matrix.nnz < 2**31 else np.int64
+        for prefix, matrix in (("", self.matrix), ("postings_", self.postings)):
+            np.save(os.path.join(path, f"{prefix}data.npy"), matrix.data.astype(np.float32))
+            np.save(os.path.join(path, f"{prefix}indices.npy"), matrix.indices.astype(index_dtype))
+            np.save(os.path.join(path, f"{prefix}indptr.npy"), matrix.indptr.astype(index_dtype))
+        np.save(os.path.join(path, "idf.npy"), np.asarray(self.idf, dtype=np.float64))
+        np.save(os.path.join(path, "ids.npy"), np.asarray(self.ids, dtype=np.int64))
+        with open(os.path.join(path, "vocab.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.vocabulary))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "shape": list(self.matrix.shape), "text": self.text,
+                       "source": self.source}, f)
+
+    @classmethod
+    def load(cls, path: str = INDEX_DIR, mmap: bool = True) -> "SearchIndex":
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index version: {meta.get('version')}")
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+            for name in ("data", "indices", "indptr", "idf", "ids")
+        }
+        with open(os.path.join(path, "vocab.txt"), encoding="utf-8") as f:
+            vocabulary = f.read().split("\n")
+        matrix = sp.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=tuple(meta["shape"]), copy=False,
+        )
+        postings = None
+        if os.path.exists(os.path.join(path, "postings_data.npy")):  # older indexes transpose on load
+            postings = sp.csr_matrix(
+                tuple(np.load(os.path.join(path, f"postings_{name}.npy"), mmap_mode=mode)
+                      for name in ("data", "indices", "indptr")),
+                shape=tuple(reversed(meta["shape"])), copy=False,
+            )
+        return cls(vocabulary, arrays["idf"], matrix, arrays["ids"], meta.get("text", "search"), postings,
+                   meta.get("source"))
+
+
+def load_or_build(store: RecipeStore, path: str = INDEX_DIR, text: str = "search") -> SearchIndex:
+    """Memory-map the prebuilt index, rebuilding in memory if it is missing or stale."""
+    if os.path.exists(os.path.join(path, "meta.json")):
+        try:
+            index = SearchIndex.load(path)
+            if index.text == text and index.matches(store):
+                return index
+            print(f"Search index at {path} does not match the corpus; rebuilding in memory.")
+        except (OSError, ValueError) as e:
+            print(f"Could not load search index from {path}: {e}")
+    return SearchIndex.build(store, text=text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the prebuilt TF-IDF search index")
+    parser.add_argument("--min-df", type=int, default=0,
+                        help="use nlpTerms.tsv terms in at least N recipes as the vocabulary (0: fit it)")
+    parser.add_argument("--index-dir", default=os.getenv("COOKMATE_INDEX_DIR") or INDEX_DIR,
+                        help="output directory (default: $COOKMATE_INDEX_DIR or utils/index)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = RecipeStore.load()
+    vocabulary = None
+    if args.min_df > 0:
+        from utils.build_nlp_words import read_terms
+        terms = read_terms()
+        vocabulary = terms.index[terms["df"] >= args.min_df].tolist()
+    index = SearchIndex.build(store, vocabulary)
+    index.save(args.index_dir)
+    ingredients = SearchIndex.build(store, text="ingredients")
+    ingredients.save(os.path.join(args.index_dir, INGREDIENT_INDEX))
+    print(f"Built {args.index_dir}: {len(index)} recipes, {len(index.vocabulary)} search terms, "
+          f"{len(ingredients.vocabulary)} ingredient terms in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,187 @@
+"""The live corpus snapshot and its background (re)loading.
+
+Importing this module is cheap: pandas, scikit-learn and the corpus code
+are only imported when a snapshot is first built, so the API can answer
+``/health`` while its first snapshot is still loading.
+"""
+import hashlib
+import os
+import threading
+import time
+import traceback
+
+from utils.fuzzy import TERMS_PATH, WORDS_PATH
+
+
+class NotReady(Exception):
+    """No snapshot has finished loading yet."""
+
+
+class Snapshot:
+    """Store, recommender and search index built from one corpus version.
+
+    Handlers grab ``holder.current`` once per request and use only that
+    object, so a reload never mixes rows from two versions mid-request.
+    """
+
+    def __init__(self, store, recommender, search_index, matcher=None, generation=0,
+                 build_seconds=0.0, version=""):
+        self.store = store
+        self.recommender = recommender
+        self.search_index = search_index
+        self.matcher = matcher
+        # Query terms the vectorizer already understands; never "corrected"
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        self.known_terms = frozenset(search_index.vocabulary if search_index else ()) | ENGLISH_STOP_WORDS
+        self.generation = generation
+        self.build_seconds = build_seconds
+        # Same source files -> same version in every worker (shared cache keys)
+        self.version = version
+        self.loaded_at = time.time()
+
+
+def source_mtimes(csv_path, index_dir=None):
+    """Modification times of every file a snapshot is built from (None if missing)."""
+    from utils.corpus import corpus_dir_for
+    from utils.neighbours import NEIGHBOURS
+    from utils.search_index import INDEX_DIR, INGREDIENT_INDEX
+
+    index_dir = index_dir or INDEX_DIR
+    paths = [
+        csv_path,
+        os.path.join(corpus_dir_for(csv_path), "meta.json"),
+        os.path.join(index_dir, "meta.json"),
+        os.path.join(index_dir, INGREDIENT_INDEX, "meta.json"),
+        os.path.join(index_dir, NEIGHBOURS, "meta.json"),
+        TERMS_PATH,
+        WORDS_PATH,
+    ]
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
+
+
+def load_matcher(terms_path=TERMS_PATH, words_path=WORDS_PATH):
+    """Vocabulary from build_nlp_words.py: df-weighted when the term table exists."""
+    from utils.fuzzy import FuzzyMatcher
+
+    if os.path.exists(terms_path):
+        return FuzzyMatcher.from_terms(terms_path)
+    if os.path.exists(words_path):
+        return FuzzyMatcher.from_file(words_path)
+    return None
+
+
+def build_snapshot(csv_path, index_dir=None, generation=0, ann=None) -> Snapshot:
+    from utils.ai_recommender import RecipeRecommender
+    from utils.neighbours import NEIGHBOURS, load_neighbours
+    from utils.recipe_store import RecipeStore
+    from utils.search_index import INDEX_DIR, INGREDIENT_INDEX, load_or_build
+
+    index_dir = index_dir or INDEX_DIR
+    started = time.perf_counter()
+    version = hashlib.sha1(repr((source_mtimes(csv_path, index_dir), ann)).encode()).hexdigest()[:12]
+    store = RecipeStore.load(csv_path)
+    recommender = search_index = None
+    if not store.empty:
+        # Both prebuilt by `python -m utils.search_index`; mmapped so no worker refits TF-IDF
+        search_index = load_or_build(store, index_dir)
+        ingredients = load_or_build(store, os.path.join(index_dir, INGREDIENT_INDEX), text="ingredients")
+        recommender = RecipeRecommender(store=store, ann=ann, index=ingredients)
+        # Prebuilt by `python -m utils.neighbours`; /recommend/by_recipe reads it first
+        recommender.neighbours = load_neighbours(recommender, os.path.join(index_dir, NEIGHBOURS))
+    matcher = load_matcher()  # for /suggest and query correction
+    return Snapshot(store, recommender, search_index, matcher, generation,
+                    build_seconds=time.perf_counter() - started, version=version)
+
+
+class SnapshotHolder:
+    """Owns the live snapshot and rebuilds it in the background on demand.
+
+    With ``load=False`` nothing is built until ``reload`` is called, and
+    ``current`` raises ``NotReady`` until that first build has finished.
+    """
+
+    def __init__(self, csv_path, index_dir=None, ann=None, load=True):
+        self.csv_path = csv_path
+        self.index_dir = index_dir  # None: utils/index
+        self.ann = ann
+        self.last_error = None
+        self._current = None
+        self._reload_lock = threading.Lock()
+        self._reloading = False
+        self._watcher = None
+        if load:
+            self._current = build_snapshot(self.csv_path, self.index_dir, ann=ann)
+
+    @property
+    def current(self) -> Snapshot:
+        snapshot = self._current
+        if snapshot is None:
+            raise NotReady(self.last_error or "corpus is still loading")
+        return snapshot
+
+    @property
+    def ready(self) -> bool:
+        return self._current is not None
+
+    def _build_and_swap(self):
+        try:
+            generation = self._current.generation + 1 if self._current is not None else 0
+            snapshot = build_snapshot(self.csv_path, self.index_dir, generation, self.ann)
+            self._current = snapshot  # single reference swap; old readers keep theirs
+            self.last_error = None
+            print(f"{'Reloaded' if generation else 'Loaded'} corpus: {len(snapshot.store)} recipes "
+                  f"in {snapshot.build_seconds:.2f}s (generation {snapshot.generation})")
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            self._reloading = False
+
+    def reload(self, wait: bool = False) -> bool:
+        """Start a rebuild; returns False when one is already running."""
+        with self._reload_lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+        if wait:
+            self._build_and_swap()
+        else:
+            threading.Thread(target=self._build_and_swap, name="corpus-reload", daemon=True).start()
+        return True
+
+    def status(self) -> dict:
+        snapshot = self._current
+        if snapshot is None:
+            return {"ready": False, "reloading": self._reloading, "lastError": self.last_error}
+        return {
+            "ready": True,
+            "generation": snapshot.generation,
+            "version": snapshot.version,
+            "recipes": len(snapshot.store),
+            "buildSeconds": round(snapshot.build_seconds, 3),
+            "loadedAt": snapshot.loaded_at,
+            "reloading": self._reloading,
+            "lastError": self.last_error,
+        }
+
+    # ---- File watch ----
+    def _source_mtimes(self):
+        return source_mtimes(self.csv_path, self.index_dir)
+
+    def watch(self, interval: float):
+        """Poll the CSV, corpus, index and vocabulary files; reload when any of them changes."""
+        if self._watcher is not None:
+            return
+
+        def loop():
+            seen = pending = self._source_mtimes()
+            while True:
+                time.sleep(interval)
+                mtimes = self._source_mtimes()
+                # Wait for one quiet interval so we don't load a half-written file
+                if mtimes != seen and mtimes == pending and self.reload():
+                    seen = mtimes
+                pending = mtimes
+
+        self._watcher = threading.Thread(target=loop, name="corpus-watch", daemon=True)
+        self._watcher.start()
@@ -0,0 +1,77 @@
+"""Food-name suggestions for misspelled phrases (the api/test.py helper).
+
+Phrases are lowercased, stripped of digits, punctuation and Turkish stop
+words, lemmatized, then matched against nlpWords.txt with ``FuzzyMatcher``
+(the indexed replacement for ``difflib.get_close_matches``). Try it from
+the AI/ directory with::
+
+    python -m utils.suggestions
+"""
+import re
+import string
+from functools import lru_cache
+
+from utils.fuzzy import FuzzyMatcher, WORDS_PATH
+
+turkish_stop_words = [
+    "a", "acaba", "altı", "ama", "ancak", "bazen", "bazı", "belki", "ben",
+    "benden", "beni", "benim", "bir", "biraz", "birçoğu", "biri", "birkaç", "biz",
+    "bizden", "bize", "bizi", "bizim", "bu", "bunun", "bunu", "her", "herhangi", "hem",
+    "hep", "için", "işte", "kadar", "karşı", "kendi", "kendine", "ki", "mı",
+    "mi", "çok", "çünkü", "de", "den", "daha", "diğer", "ile", "ilgili",
+    "gibi", "henüz", "hiç", "iç", "şu", "şöyle", "tüm", "tümü", "ya",
+    "yani", "yok", "ve", "veya", "üzere",
+]
+
+stop_words = set(turkish_stop_words)
+_punct = str.maketrans("", "", string.punctuation)
+
+
+@lru_cache(maxsize=1)
+def get_matcher(path: str = WORDS_PATH) -> FuzzyMatcher:
+    """Fuzzy index over nlpWords.txt, built on first use."""
+    return FuzzyMatcher.from_file(path)
+
+
+@lru_cache(maxsize=1)
+def _lemmatizer():
+    # nltk is only needed for lemmatizing; load it (and its data) lazily
+    import nltk
+    from nltk.stem import WordNetLemmatizer
+
+    lemmatizer = WordNetLemmatizer()
+    try:
+        lemmatizer.lemmatize("test")
+    except LookupError:
+        nltk.download("wordnet")
+    return lemmatizer
+
+
+def suggest(phrase: str, n: int = 3, cutoff: float = 0.65, matcher: FuzzyMatcher = None):
+    """Close vocabulary matches for one phrase after lemmatizing its words."""
+    phrase = re.sub(r"\d+", "", phrase.lower()).translate(_punct)
+    lemmatizer = _lemmatizer()
+    processed_words = [lemmatizer.lemmatize(word) for word in phrase.split() if word not in stop_words]
+    return (matcher or get_matcher()).get_close_matches(" ".join(processed_words), n=n, cutoff=cutoff)
+
+
+def preprocess_text(text, matcher: FuzzyMatcher = None):
+    phrases = [phrase.strip() for phrase in text.split(",")]
+
+    results = []
+    for phrase in phrases:
+        original_phrase = phrase.lower()
+        close_matches = suggest(original_phrase, n=3, cutoff=0.65, matcher=matcher)
+
+        if not close_matches:
+            results.append(f"'{original_phrase}' yanlış yazılmış ancak yiyeceklerle ilgili öneri bulunamadı.")
+        else:
+            suggestion_text = f"'{original_phrase}' yanlış yazılmış. Yiyeceklerle ilgili öneriler: {', '.join(close_matches)}"
+            results.append(suggestion_text)
+
+    return "\n\n".join(results)
+
+
+if __name__ == "__main__":
+    word = "limonlu turto,peynir rulalaro, bastırma"
+    print(preprocess_text(word))
@@ -0,0 +1,68 @@
+"""Synthetic recipe corpora in the updatedRecipe.csv schema, for benchmarks.
+
+The real CSV is large and not always checked out, so benchmarks generate
+their corpus instead. Recipes are drawn from a handful of "cuisines", each
+with its own Zipf-weighted ingredient pool, so similarity search has the
+kind of cluster structure real recipes have rather than uniform noise.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.corpus import prepare_corpus
+
+_SYLLABLES = ["ba", "co", "di", "fe", "ga", "hi", "ka", "lo", "ma", "ne", "pi", "ro",
+              "sa", "ti", "vu", "ze", "qua", "shi", "tor", "len"]
+_DISHES = ["soup", "stew", "salad", "curry", "pie", "bake", "tart", "roast", "pasta", "bowl"]
+
+
+def _vocabulary(size: int, rng) -> np.ndarray:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES, size=rng.integers(2, 4))))
+    return np.array(sorted(words))
+
+
+def synthetic_recipes(n: int, seed: int = 0, vocabulary: int = 5000, topics: int = 50) -> pd.DataFrame:
+    """``n`` raw recipe rows (RecipeId, Name, RecipeIngredientParts, ...)."""
+    rng = np.random.default_rng(seed)
+    words = _vocabulary(vocabulary, rng)
+    # Each topic favours its own random permutation of the vocabulary
+    pools = np.stack([rng.permutation(vocabulary) for _ in range(topics)])
+    zipf = 1.0 / np.arange(1, vocabulary + 1)
+    zipf /= zipf.sum()
+
+    topic = rng.integers(0, topics, size=n)
+    sizes = rng.integers(4, 14, size=n)
+    # Draw ranks for every row at once (with replacement), keep each row's first unique ones
+    ranks = np.searchsorted(np.cumsum(zipf), rng.random((n, 16)), side="right").clip(max=vocabulary - 1)
+    drawn = words[pools[topic[:, None], ranks]]
+    ingredients, names = [], []
+    for t, size, row in zip(topic.tolist(), sizes.tolist(), drawn.tolist()):
+        parts = list(dict.fromkeys(row))[:size]
+        ingredients.append("c(" + ", ".join(f'"{p}"' for p in parts) + ")")
+        names.append(f"{parts[0].title()} {_DISHES[t % len(_DISHES)]}")
+
+    minutes = rng.integers(5, 240, size=n)
+    return pd.DataFrame({
+        "RecipeId": np.arange(1, n + 1, dtype=np.int64),
+        "Name": names,
+        "RecipeIngredientParts": ingredients,
+        "RecipeInstructions": 'c("Mix everything.", "Cook until done.")',
+        "TotalTime": [f"PT{m // 60}H{m % 60}M" if m >= 60 else f"PT{m}M" for m in minutes.tolist()],
+        "CookTime": [f"PT{m}M" for m in (minutes // 2).tolist()],
+        "Calories": rng.gamma(4.0, 100.0, size=n).round(1),
+        "Images": 'c("https://img.example.com/recipe.jpg")',
+        "AggregatedRating": np.where(rng.random(n) < 0.2, np.nan, rng.integers(1, 11, size=n) / 2),
+        "FatContent": rng.gamma(2.0, 8.0, size=n).round(1),
+        "ProteinContent": rng.gamma(2.0, 10.0, size=n).round(1),
+        "CarbohydrateContent": rng.gamma(3.0, 15.0, size=n).round(1),
+        "FiberContent": rng.gamma(1.5, 2.0, size=n).round(1),
+    })
+
+
+def synthetic_store(n: int, seed: int = 0, **kwargs):
+    """A ``RecipeStore`` over ``synthetic_recipes(n)``, built like the real one."""
+    from utils.recipe_store import RecipeStore, normalize_recipes
+
+    return RecipeStore(normalize_recipes(prepare_corpus(synthetic_recipes(n, seed, **kwargs))),
+                       source=f"synthetic:{n}:{seed}")
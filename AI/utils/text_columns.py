@@ -0,0 +1,108 @@
+"""Compact, read-only string columns for the serving store.
+
+A ``TextColumn`` keeps every string of a field in one UTF-8 blob with an
+offsets array, instead of one Python ``str`` per row. With ``codes`` the
+distinct values are stored once and each row points at one of them (image
+URLs, cook times). ``TextLists`` holds a list per row the same way, over
+interned items (ingredient tokens, instruction steps).
+
+All state is plain numpy arrays (see ``arrays``/``from_arrays``), so the
+store can save them with its other arrays and every worker memory-maps the
+same pages. Strings are only decoded for the rows a response returns.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.corpus import _encode_strings
+
+
+class TextColumn:
+    """One string per row, decoded on access."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, codes: np.ndarray = None):
+        self.blob = blob
+        self.offsets = offsets
+        self.codes = codes  # row -> distinct value, or None when rows are the values
+        self._view = memoryview(blob)
+
+    def __len__(self):
+        return len(self.codes) if self.codes is not None else len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.value(self.codes[row] if self.codes is not None else row)
+
+    def value(self, j: int) -> str:
+        """The ``j``-th stored (distinct) string."""
+        return str(self._view[self.offsets[j]:self.offsets[j + 1]], "utf-8")
+
+    def values(self) -> np.ndarray:
+        """Every stored string, decoded (object array; offline builds only)."""
+        raw = self.blob.tobytes()
+        bounds = self.offsets.tolist()
+        return np.array([raw[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])], dtype=object)
+
+    def series(self) -> pd.Series:
+        """The whole column as a pandas Series of str (offline builds only)."""
+        values = self.values()
+        return pd.Series(values[self.codes] if self.codes is not None else values, dtype=object)
+
+    def contains(self, needle: str) -> np.ndarray:
+        """Row mask of values containing ``needle`` (case-sensitive substring)."""
+        hits = np.zeros(len(self.offsets) - 1, dtype=bool)
+        pattern = needle.encode("utf-8")
+        raw = self.blob.tobytes()
+        at = raw.find(pattern)
+        while at >= 0:
+            j = int(np.searchsorted(self.offsets, at, side="right")) - 1
+            if at + len(pattern) <= self.offsets[j + 1]:  # not spanning two values
+                hits[j] = True
+                at = raw.find(pattern, int(self.offsets[j + 1]))
+            else:
+                at = raw.find(pattern, at + 1)
+        return hits[self.codes] if self.codes is not None else hits
+
+    @classmethod
+    def encode(cls, values, dedupe: bool = False) -> "TextColumn":
+        if dedupe:
+            codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+            blob, offsets, _ = _encode_strings(uniques.tolist())
+            return cls(blob, offsets, codes.astype(np.int32))
+        blob, offsets, _ = _encode_strings(values)
+        return cls(blob, offsets)
+
+    def arrays(self, prefix: str) -> dict:
+        arrays = {f"{prefix}_blob": self.blob, f"{prefix}_offsets": self.offsets}
+        if self.codes is not None:
+            arrays[f"{prefix}_codes"] = self.codes
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, prefix: str) -> "TextColumn":
+        return cls(arrays[f"{prefix}_blob"], arrays[f"{prefix}_offsets"], arrays.get(f"{prefix}_codes"))
+
+
+class TextLists:
+    """A list of strings per row: ``items`` (interned) split by row ``bounds``."""
+
+    def __init__(self, items: TextColumn, bounds: np.ndarray):
+        self.items = items
+        self.bounds = bounds
+
+    def __len__(self):
+        return len(self.bounds) - 1
+
+    def __getitem__(self, row: int):
+        start, stop = self.bounds[row], self.bounds[row + 1]
+        return [self.items.value(j) for j in self.items.codes[start:stop].tolist()]
+
+    @classmethod
+    def encode(cls, items, bounds) -> "TextLists":
+        """From flat ``items`` where row i is ``items[bounds[i]:bounds[i + 1]]``."""
+        return cls(TextColumn.encode(items, dedupe=True), np.asarray(bounds, dtype=np.int64))
+
+    def arrays(self, prefix: str) -> dict:
+        return {**self.items.arrays(prefix), f"{prefix}_bounds": self.bounds}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, prefix: str) -> "TextLists":
+        return cls(TextColumn.from_arrays(arrays, prefix), arrays[f"{prefix}_bounds"])
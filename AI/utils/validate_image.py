@@ -1,9 +1,17 @@
-import pandas as pd
 import requests
 import time
-import random
 import shutil
+import os
+import sys
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.corpus import read_recipe_csv
 
 # Fallback images from your API
 # Use YOUR fallback image from API  
@@ -27,19 +35,22 @@ def clean_url(raw_url):
     
     return None
 
-def validate_image_url(url, timeout=10):
+# Set headers to mimic a browser
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def validate_image_url(url, timeout=10, session=None):
     """Check if image URL is accessible - less strict validation"""
     if not url:
         return False
     
+    http = session or requests
     try:
-        # Set headers to mimic a browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        headers = HEADERS
         
         # Try HEAD request first (faster)
-        response = requests.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+        response = http.head(url, headers=headers, timeout=timeout, allow_redirects=True)
         
         # Accept more status codes - be less strict
         if response.status_code in [200, 301, 302, 403]:  # Sometimes 403 means accessible but blocked HEAD requests
@@ -48,7 +59,8 @@ def validate_image_url(url, timeout=10):
         # If HEAD fails, try GET request (some servers block HEAD)
         if response.status_code == 405:  # Method not allowed
             try:
-                response = requests.get(url, headers=headers, timeout=timeout, stream=True)
+                response = http.get(url, headers=headers, timeout=timeout, stream=True)
+                response.close()
                 if response.status_code in [200, 301, 302]:
                     return True
             except:
@@ -59,22 +71,114 @@ def validate_image_url(url, timeout=10):
     except Exception:
         return False
 
-def validate_and_fix_csv(csv_path):
+# ---- Concurrent validation ----
+def make_session(pool_size=32):
+    """Session with a connection pool big enough for every worker thread."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+class HostLimiter:
+    """Caps concurrent requests and request starts per second for each host."""
+
+    def __init__(self, per_host=4, rate=5.0):
+        self.per_host = per_host
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    def acquire(self, host):
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        slot.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, host):
+        self._slots[host].release()
+
+class Checkpoint:
+    """Append-only JSON-lines record of checked URLs, so reruns resume."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._torn = False
+
+    def load(self):
+        results = {}
+        if self.path and os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    # torn last line from an interrupted run: start the next record on a new line
+                    self._torn = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                        results[entry["url"]] = entry["ok"]
+                    except (ValueError, KeyError):
+                        continue
+        return results
+
+    def record(self, url, ok):
+        if not self.path:
+            return
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(("\n" if self._torn else "") + json.dumps({"url": url, "ok": ok}) + "\n")
+            self._torn = False
+
+def validate_urls(urls, workers=16, per_host=4, rate=5.0, timeout=10,
+                  checkpoint_path=None, session=None, progress_every=100):
+    """Check each distinct URL once, concurrently; returns {url: accessible}.
+
+    URLs already in the checkpoint file are not requested again.
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    results = checkpoint.load()
+    pending = [u for u in dict.fromkeys(urls) if u and u not in results]
+    print(f"{len(results)} URLs from checkpoint, {len(pending)} to check")
+
+    session = session or make_session(workers)
+    limiter = HostLimiter(per_host, rate)
+
+    def check(url):
+        host = urlparse(url).netloc
+        limiter.acquire(host)
+        try:
+            return validate_image_url(url, timeout=timeout, session=session)
+        finally:
+            limiter.release(host)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(check, u): u for u in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            url = futures[future]
+            results[url] = bool(future.result())
+            checkpoint.record(url, results[url])
+            if done % progress_every == 0:
+                print(f"Progress: {done}/{len(pending)} URLs checked")
+    return results
+
+def validate_and_fix_csv(csv_path, concurrent=False, workers=16, per_host=4, rate=5.0,
+                         checkpoint_path=None):
     """Validate image URLs and fix broken ones with placeholders"""
     
     print(f"Loading CSV from {csv_path}...")
     
-    # Load CSV
+    # Load the CSV itself (not the columnar copy): this script rewrites it
     try:
-        df = pd.read_csv(csv_path, encoding='utf-8')
+        df = read_recipe_csv(csv_path)
     except Exception as e:
         print(f"Error loading CSV: {e}")
         return None
     
-    # Handle BOM in column names
-    if "\ufeffRecipeId" in df.columns:
-        df = df.rename(columns={"﻿RecipeId": "RecipeId"})
-    
     print(f"Found {len(df)} recipes")
     
     # Check if Images column exists
@@ -91,39 +195,48 @@ def validate_and_fix_csv(csv_path):
     print("Fixing broken images with placeholder images")
     print("-" * 60)
     
-    for index, row in df.iterrows():
-        recipe_name = row.get('Name', f'Recipe {index}')
-        original_url = row.get('Images', '')
+    if concurrent:
+        cleaned = df['Images'].map(clean_url)
+        results = validate_urls(cleaned.dropna().tolist(), workers=workers, per_host=per_host,
+                                rate=rate, checkpoint_path=checkpoint_path)
+        ok = cleaned.map(lambda u: bool(u) and results.get(u, False))
+        df['Images'] = cleaned.where(ok, FALLBACK_IMAGE)
+        valid_count = int(ok.sum())
+        fixed_count = total_recipes - valid_count
+    else:
+        for index, row in df.iterrows():
+            recipe_name = row.get('Name', f'Recipe {index}')
+            original_url = row.get('Images', '')
         
-        # Clean the URL
-        cleaned_url = clean_url(original_url)
+            # Clean the URL
+            cleaned_url = clean_url(original_url)
         
-        if not cleaned_url:
-            df.at[index, 'Images'] = FALLBACK_IMAGE
-            fixed_count += 1
-            print(f"Row {index}: {recipe_name[:40]:<40} | NO URL -> FIXED")
-        else:
-            # Test if URL is accessible (with lenient validation)
-            if validate_image_url(cleaned_url):
-                # URL is working
-                df.at[index, 'Images'] = cleaned_url
-                valid_count += 1
-                print(f"Row {index}: {recipe_name[:40]:<40} | VALID")
-            else:
-                # URL is broken, replace with YOUR fallback
+            if not cleaned_url:
                 df.at[index, 'Images'] = FALLBACK_IMAGE
                 fixed_count += 1
-                print(f"Row {index}: {recipe_name[:40]:<40} | BROKEN -> FIXED")
+                print(f"Row {index}: {recipe_name[:40]:<40} | NO URL -> FIXED")
+            else:
+                # Test if URL is accessible (with lenient validation)
+                if validate_image_url(cleaned_url):
+                    # URL is working
+                    df.at[index, 'Images'] = cleaned_url
+                    valid_count += 1
+                    print(f"Row {index}: {recipe_name[:40]:<40} | VALID")
+                else:
+                    # URL is broken, replace with YOUR fallback
+                    df.at[index, 'Images'] = FALLBACK_IMAGE
+                    fixed_count += 1
+                    print(f"Row {index}: {recipe_name[:40]:<40} | BROKEN -> FIXED")
         
-        # Progress update
-        if (index + 1) % 100 == 0:
-            print(f"\nProgress: {index + 1}/{total_recipes} processed")
-            print(f"Valid: {valid_count}, Fixed: {fixed_count}")
-            print("-" * 60)
+            # Progress update
+            if (index + 1) % 100 == 0:
+                print(f"\nProgress: {index + 1}/{total_recipes} processed")
+                print(f"Valid: {valid_count}, Fixed: {fixed_count}")
+                print("-" * 60)
         
-        # Minimal delay to be respectful to servers
-        if index % 20 == 0:
-            time.sleep(0.1)
+            # Minimal delay to be respectful to servers
+            if index % 20 == 0:
+                time.sleep(0.1)
     
     # Final statistics
     print(f"\n{'='*60}")
@@ -138,8 +251,18 @@ def validate_and_fix_csv(csv_path):
     return df
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fix broken recipe image URLs")
+    parser.add_argument("csv", nargs="?", default="updatedRecipe.csv")
+    parser.add_argument("--concurrent", action="store_true", help="check URLs with a thread pool")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--per-host", type=int, default=4, help="max in-flight requests per host")
+    parser.add_argument("--rate", type=float, default=5.0, help="max requests per second per host")
+    parser.add_argument("--checkpoint", help="resume file (default: <csv>.imgcheck.jsonl)")
+    args = parser.parse_args()
+
     # Configuration
-    CSV_FILE = "updatedRecipe.csv"  # Your CSV file name
+    CSV_FILE = args.csv  # Your CSV file name
+    CHECKPOINT = args.checkpoint or CSV_FILE + ".imgcheck.jsonl"
     
     print("CSV Recipe Image Fixer")
     print("=" * 60)
@@ -163,7 +286,9 @@ if __name__ == "__main__":
         exit()
     
     # Process the CSV
-    fixed_data = validate_and_fix_csv(CSV_FILE)
+    fixed_data = validate_and_fix_csv(CSV_FILE, concurrent=args.concurrent, workers=args.workers,
+                                      per_host=args.per_host, rate=args.rate,
+                                      checkpoint_path=CHECKPOINT if args.concurrent else None)
     
     if fixed_data is not None:
         # Save the fixed data back to original file
@@ -172,7 +297,9 @@ if __name__ == "__main__":
             print(f"\nFixed CSV saved to: {CSV_FILE}")
             print(f"Backup available at: {backup_file}")
             print("\nAll your recipes are preserved with working images!")
-            print("Restart your API server to see the changes!")
+            print("POST /admin/reload on the API (or let its file watcher pick it up) to see the changes!")
+            if args.concurrent and os.path.exists(CHECKPOINT):
+                os.remove(CHECKPOINT)  # run finished; next run should re-check
         except Exception as e:
             print(f"Error saving fixed CSV: {e}")
     else: